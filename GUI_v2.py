@@ -1,12 +1,8 @@
 from guiABLE import *
 from tkinter import filedialog
-from tkinter import simpledialog
-from tkinter import tkFileDialog
 from tkinter import font
-import keyboard
 from time import sleep
-import webbrowser
-from pytube import YouTube
+import platformInput
 
 
 class CheckList(tk.Frame):
@@ -26,6 +22,79 @@ class CheckList(tk.Frame):
         self.pattern["enabled"] = not self.pattern["enabled"]
         print(self.pattern["name"], "-", self.pattern["enabled"])
 
+    def setPattern(self, pattern, txt, locked=False):     # Re-point a recycled row at another pattern.
+        self.pattern = pattern
+        self.name = pattern["name"]
+        if self.lbl.text != txt:
+            self.lbl.config(text=txt)
+            self.lbl.text = txt
+        self.checkbtn.state(pattern["enabled"])
+        if locked == self.checkbtn.enabled:
+            self.checkbtn.disable() if locked else self.checkbtn.enable()
+
+    def setHighlight(self, highlighted):
+        self.lbl.config(bg="#5bc8c8", fg="#214449") if highlighted else self.lbl.config(bg="#214449", fg="#5bc8c8")
+
+
+class PatternList:
+    # Only the rows that fit in the pane exist. A spacer gives the pane's inner frame the height of the whole list
+    # so the scrollbar works as before, and the row widgets are re-bound to whichever patterns are scrolled into view.
+    row_height = 23
+
+    def __init__(self, pane, skin1=None, skin2=None, bg_color="#214449"):
+        self.pane = pane
+        self.skin1, self.skin2, self.bg_color = skin1, skin2, bg_color
+        self.running = {"name": "RT:Running", "enabled": True}
+        self.entries = []       # Patterns in list order, "Running" first.
+        self.index = {}         # Pattern name -> position in entries.
+        self.highlighted = None
+        self.rows = []
+        self._shown = {}        # Position in entries -> row currently showing it.
+        self._first = None
+        [child.destroy() for child in pane.inner.winfo_children()]
+        self.spacer = tk.Frame(pane.inner, width=pane.inner_width, height=1, bg=bg_color, highlightthickness=0)
+        self.spacer.grid(row=0, column=0)
+        pane.inner.bind("<Configure>", self.refresh, "+")
+
+    def load(self, patterns=None):
+        self.entries = [] if patterns is None else [self.running] + list(patterns)
+        self.index = {entry["name"]: n for n, entry in enumerate(self.entries)}
+        self.highlighted = None
+        count = min(len(self.entries), -(-self.pane.inner_height // self.row_height) + 1)
+        while len(self.rows) > count:
+            self.rows.pop().destroy()
+        while len(self.rows) < count:
+            self.rows.append(CheckList(self.pane.inner, self.running, bg_color=self.bg_color,
+                                       skin1=self.skin1, skin2=self.skin2))
+        self.spacer.config(height=max(1, len(self.entries) * self.row_height))
+        self._first = None
+        self.refresh()
+
+    def refresh(self, event=None):
+        first = max(0, int(-self.pane.inner.winfo_y() / self.row_height))
+        first = min(first, len(self.entries) - len(self.rows))
+        if first == self._first:
+            return
+        self._first = first
+        self._shown = {}
+        for n, row in enumerate(self.rows):
+            index = first + n
+            entry = self.entries[index]
+            row.setPattern(entry, entry["name"][3:], entry is self.running)
+            row.setHighlight(index == self.highlighted)
+            row.place(x=0, y=index * self.row_height)
+            self._shown[index] = row
+
+    def highlight(self, name=None):
+        index = self.index.get(name)
+        if name is not None and index is None:
+            return
+        if self.highlighted in self._shown:
+            self._shown[self.highlighted].setHighlight(False)
+        self.highlighted = index
+        if index in self._shown:
+            self._shown[index].setHighlight(True)
+
 
 
 class HoverableButton(tk.Button):
@@ -66,6 +135,7 @@ class GUI(Windowable):
         super().__init__("207x384" + self.file.window_position, "SplitRP")
         # Setup window and background
         self.closing = False
+        self.refresher = Refresher(self.file.refresh_rate, self.file.console_log)
         self.background = Backgroundable(self, 207, 384, "UI/new_bg.png")
         self.background.place(x=0, y=0)
 
@@ -78,63 +148,18 @@ class GUI(Windowable):
 
         self.settings_bg = Backgroundable(self.settings, 176, 316, "UI/settings_bg.png")
         self.settings_bg.place(x=-166, y=0)
-        dip_skin_on = Skinnable("UI/settings_dip.png", "UI/settings_dip_mo.png", "UI/settings_dip_off.png")
-        dip_skin_off = Skinnable("UI/settings_dip_off.png", "UI/settings_dip_mo.png", "UI/settings_dip.png")
-
-        self.auto_click = Toggleable(self.settings_bg, self.file.autoclicker_active, self.autoclicker_flip,
-                                     dip_skin_on, dip_skin_off, width=24, height=14)
-        self.auto_click.place(x=22, y=103)
-        self.active_lock = Toggleable(self.settings_bg, self.file.lock_to_window, self.lock_to_window_flip,
-                                      dip_skin_on, dip_skin_off, width=24, height=14)
-        self.active_lock.place(x=22, y=123)
-        self.active_pause = Toggleable(self.settings_bg, self.file.pause_when_inactive, self.pause_when_inactive_flip,
-                                       dip_skin_on, dip_skin_off, width=24, height=14)
-        self.active_pause.place(x=22, y=143)
         self.set_defaults_skin = Skinnable("UI/settings_button.png", "UI/settings_button_mo.png", "UI/settings_button_active.png")
 
-        validate_int = (self.register(self.valid_int), '%P')
-        validate_posint = (self.register(self.valid_posint), '%P')
-        validate_port = (self.register(self.valid_port), '%P')
-        self.origin_x = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
-                                 foreground="lightgray", bd=0, justify=tk.RIGHT, insertbackground="lightgray",
-                                 validate="key", validatecommand=validate_int)
-        self.origin_x.place(x=41, y=23)
-
-        self.origin_y = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
-                                 foreground="lightgray", bd=0, justify=tk.RIGHT, insertbackground="lightgray",
-                                 validate="key", validatecommand=validate_int)
-        self.origin_y.place(x=105, y=23)
-
-        self.res_width = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
-                                  foreground="lightgray", bd=0, justify=tk.RIGHT, insertbackground="lightgray",
-                                 validate="key", validatecommand=validate_posint)
-        self.res_width.place(x=41, y=64)
-        self.res_height = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
-                                   foreground="lightgray", bd=0, justify=tk.RIGHT, insertbackground="lightgray",
-                                 validate="key", validatecommand=validate_posint)
-        self.res_height.place(x=105, y=64)
-
-        self.reset_key = HoverableButton(self.settings_bg, font=font.Font(font="Courier 9"), bg="#1b1b1b", width=6,
-                                  foreground="lightgray", bd=0, padx=0, pady=0, highlightthickness=0, relief=tk.SOLID,
-                                  justify=tk.CENTER, text="PRESS", command=self.getKey)
-        self.reset_key.place(x=75, y=185)
-
-        self.ls_host = tk.Entry(self.settings_bg, width=15, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
-                                foreground="lightgray", bd=0, justify=tk.LEFT, insertbackground="lightgray")
-        self.ls_host.place(x=55, y=250)
-        self.ls_port = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
-                                foreground="lightgray", bd=0, justify=tk.LEFT, insertbackground="lightgray",
-                                validate="key", validatecommand=validate_port)
-        self.ls_port.place(x=53, y=275)
-
         self.set_defaults_btn = Pushable(self.settings_bg, self.setDefaults, self.set_defaults_skin,
                                          width=24, height=24)
         self.set_defaults_btn.disable()
         self.set_defaults_btn.place(x=145, y=286)
 
-        rp_btn_skin = Skinnable("UI/rp_pixel.png", "UI/rp_pixel_mo.png", "UI/rp_pixel_active.png", "UI/rp_pixel_active.png")
-        self.rp_btn = Pushable(self.settings_bg, self.warrantyVoid, rp_btn_skin, width=19, height=19)
-        self.rp_btn.place(x=21, y=190)
+        self._settings_built = False    # The rest of the panel is built by buildSettings() on first open.
+        self._settings_open = False
+        self.settings_widths = (10, 176)    # Closed, open.
+        self.settings_slide = .2            # Seconds to open or close.
+        self._slide = None                  # [after() id, start width, start time] while the panel moves.
 
         # Main Window
         self.checkbox_true = Skinnable("UI/new_checkbox.png", "UI/new_checkbox_mo.png", "UI/new_checkbox_active.png",
@@ -176,6 +201,10 @@ class GUI(Windowable):
         self.led_2_skin = Skinnable("UI/LED_blue.png", "UI/LED_off.png", disabled_path="UI/LED_off.png")
         self.led_2 = Imageable(self, self.led_2_skin, width=10, height=10)
         self.led_2.place(x=76, y=363)
+        self.blink_interval = 115    # ms between LED toggles.
+        self.leds = [[self.led_1, 0, None, 0],      # [widget, toggles left, pending after() id, color]
+                     [self.led_2, 0, None]]
+        self._fps_shown = -1
 
         # Place text labels
 
@@ -183,7 +212,7 @@ class GUI(Windowable):
                                  else "No File Loaded", bg="#214449", fg="#5bc8c8", width=21,
                                  font=font.Font(font="Courier 8"), bd=0, pady=0, anchor=tk.NW)
         self.file_lbl.place(x=8, y=32)
-        self.fps_lbl = tk.Label(self.osd_frm, text="60 / 59", bg="#214449", fg="#5bc8c8", font=font.Font(font="Courier 7"),
+        self.fps_lbl = tk.Label(self.osd_frm, text="60 / 16ms", bg="#214449", fg="#5bc8c8", font=font.Font(font="Courier 7"),
                                 bd=0, pady=0)
         self.fps_lbl.place(x=160, y=20, anchor=tk.E)
         self.status_lbl = tk.Label(self.osd_frm, font=font.Font(font="Courier 8"), width=22, bd=0, bg="#214449", fg="#5bc8c8")
@@ -204,8 +233,63 @@ class GUI(Windowable):
         self.scroll_test.collapse.config(bg="#214449")
         self.scroll_test.place(x=4, y=50)
         self.scroll_test.update()
-        self._last_pattern = tk.Frame()
-        self._last_pattern.lbl = tk.Label(self._last_pattern)
+        self.pattern_list = PatternList(self.scroll_test, self.checkbox_true, self.checkbox_false)
+
+        self.focus_force()
+
+    def buildSettings(self):
+        # Settings controls and the warranty overlay. Only the panel's visible edge is drawn at startup.
+        dip_skin_on = Skinnable("UI/settings_dip.png", "UI/settings_dip_mo.png", "UI/settings_dip_off.png")
+        dip_skin_off = Skinnable("UI/settings_dip_off.png", "UI/settings_dip_mo.png", "UI/settings_dip.png")
+
+        self.auto_click = Toggleable(self.settings_bg, self.file.autoclicker_active, self.autoclicker_flip,
+                                     dip_skin_on, dip_skin_off, width=24, height=14)
+        self.auto_click.place(x=22, y=103)
+        self.active_lock = Toggleable(self.settings_bg, self.file.lock_to_window, self.lock_to_window_flip,
+                                      dip_skin_on, dip_skin_off, width=24, height=14)
+        self.active_lock.place(x=22, y=123)
+        self.active_pause = Toggleable(self.settings_bg, self.file.pause_when_inactive, self.pause_when_inactive_flip,
+                                       dip_skin_on, dip_skin_off, width=24, height=14)
+        self.active_pause.place(x=22, y=143)
+
+        validate_int = (self.register(self.valid_int), '%P')
+        validate_posint = (self.register(self.valid_posint), '%P')
+        validate_port = (self.register(self.valid_port), '%P')
+        self.origin_x = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
+                                 foreground="lightgray", bd=0, justify=tk.RIGHT, insertbackground="lightgray",
+                                 validate="key", validatecommand=validate_int)
+        self.origin_x.place(x=41, y=23)
+
+        self.origin_y = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
+                                 foreground="lightgray", bd=0, justify=tk.RIGHT, insertbackground="lightgray",
+                                 validate="key", validatecommand=validate_int)
+        self.origin_y.place(x=105, y=23)
+
+        self.res_width = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
+                                  foreground="lightgray", bd=0, justify=tk.RIGHT, insertbackground="lightgray",
+                                 validate="key", validatecommand=validate_posint)
+        self.res_width.place(x=41, y=64)
+        self.res_height = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
+                                   foreground="lightgray", bd=0, justify=tk.RIGHT, insertbackground="lightgray",
+                                 validate="key", validatecommand=validate_posint)
+        self.res_height.place(x=105, y=64)
+
+        self.reset_key = HoverableButton(self.settings_bg, font=font.Font(font="Courier 9"), bg="#1b1b1b", width=6,
+                                  foreground="lightgray", bd=0, padx=0, pady=0, highlightthickness=0, relief=tk.SOLID,
+                                  justify=tk.CENTER, text="PRESS", command=self.getKey)
+        self.reset_key.place(x=75, y=185)
+
+        self.ls_host = tk.Entry(self.settings_bg, width=15, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
+                                foreground="lightgray", bd=0, justify=tk.LEFT, insertbackground="lightgray")
+        self.ls_host.place(x=55, y=250)
+        self.ls_port = tk.Entry(self.settings_bg, width=5, font=font.Font(font="Courier 9"), bg="#1b1b1b", selectbackground="darkred",
+                                foreground="lightgray", bd=0, justify=tk.LEFT, insertbackground="lightgray",
+                                validate="key", validatecommand=validate_port)
+        self.ls_port.place(x=53, y=275)
+
+        rp_btn_skin = Skinnable("UI/rp_pixel.png", "UI/rp_pixel_mo.png", "UI/rp_pixel_active.png", "UI/rp_pixel_active.png")
+        self.rp_btn = Pushable(self.settings_bg, self.warrantyVoid, rp_btn_skin, width=19, height=19)
+        self.rp_btn.place(x=21, y=190)
 
         # Warranty Voided Overlay
         self.voided = tk.Frame(self, width=160, height=285, bg="#214449")
@@ -233,81 +317,80 @@ class GUI(Windowable):
                                 activebackground="#5bc8c8", activeforeground="#214449", highlightthickness=0,
                                 font=font.Font(font="Courier 9"), text="Or don't. Your call")
         paypal_link.place(x=11, y=245)
-
-        self.focus_force()
+        self._settings_built = True
 
     def openTwitch(self):
+        import webbrowser
         webbrowser.open("http://www.twitch.tv/roninpawn", new=1)
 
     def openPaypal(self):
+        import webbrowser
         webbrowser.open("https://www.paypal.com/cgi-bin/webscr?cmd=_s-xclick&hosted_button_id=ZFUSRYTKDAGGQ&source=url", new=1)
 
     def animate_settings(self):
         if not self.settings.visible():
             self.settings.visible(True)
-        self.settings.update_idletasks()
-        # Close from opened state.
-        if self.settings.winfo_width() == 176:
-            self.speedrun.active = True
-            while self.settings.winfo_width() > 10:
-                if self.settings.winfo_width() - 6 < 10:
-                    self.settings.configure(width=10)
-                    self.settings_bg.place_configure(x=-166)
-                    break
-                self.settings.configure(width=self.settings.winfo_width() - 6)
-                self.settings_bg.place_configure(x=self.settings_bg.winfo_x() - 6)
-                self.settings.update()
-
-            self.voided.lower(self.background)
-            self.osd_frm.lift(self.background)
-            self.power_btn.state(True)
+        self._settings_open = not self._settings_open
+        if self._settings_open:
+            if not self._settings_built: self.buildSettings()
+            self.loadSettings()
+            self.stopBlinking()
+            self.osd_frm.lower(self.background)
+            self.power_btn.state(False)
+            self.power_btn.disable()
+            self.led_1.disable()
+            self.led_2.disable()
+            self.set_defaults_btn.enable()
+        else:
+            self.applySettings()
+            self.power_btn.state(self.speedrun.active)
             self.power_btn.enable()
-            self.led_1.enable()
-            self.led_2.changeImage(self.led_2_last)
-            self.led_2.enable()
+            if self.speedrun.active:
+                self.osd_frm.lift(self.background)
+                self.led_1.enable()
+                self.led_2.enable()
             self.rp_btn.enable()
             self.set_defaults_btn.disable()
 
-            ox, oy = self.origin_x.get(), self.origin_y.get()
-            ox = self.file.default_origin[0] if ox == "" or ox == "-" else int(self.origin_x.get())
-            oy = self.file.default_origin[1] if oy == "" or oy == "-" else int(self.origin_y.get())
-            rw = self.file.default_resolution[0] if self.res_width.get() == "" else int(self.res_width.get())
-            rh = self.file.default_resolution[1] if self.res_height.get() == "" else int(self.res_height.get())
+        # Detection keeps running; the panel slides a step each time Tk services timers.
+        if self._slide is not None:
+            self.after_cancel(self._slide[0])
+        self._slide = [self.after(0, self._slideSettings), self.settings.winfo_width(), time()]
+
+    def _slideSettings(self):
+        start, began = self._slide[1:]
+        target = self.settings_widths[self._settings_open]
+        progress = min(1.0, (time() - began) / self.settings_slide)
+        width = round(start + (target - start) * progress)
+        self.settings.configure(width=width)
+        self.settings_bg.place_configure(x=width - self.settings_widths[1])
+        if progress < 1.0:
+            self._slide[0] = self.after(15, self._slideSettings)
+        else:
+            self._slide = None
+            if not self._settings_open:
+                self.voided.lower(self.background)
+
+    def applySettings(self):    # Only changed values cost a pattern rescale or a reconnect.
+        ox, oy = self.origin_x.get(), self.origin_y.get()
+        ox = self.file.default_origin[0] if ox == "" or ox == "-" else int(ox)
+        oy = self.file.default_origin[1] if oy == "" or oy == "-" else int(oy)
+        rw = self.file.default_resolution[0] if self.res_width.get() == "" else int(self.res_width.get())
+        rh = self.file.default_resolution[1] if self.res_height.get() == "" else int(self.res_height.get())
+        if [ox, oy] != list(self.file.pattern_translation) or [rw, rh] != list(self.file.pattern_scale):
             self.file.pattern_translation = [ox, oy]
             self.file.pattern_scale = [rw, rh]
             self.file.loadPattern()
             self.speedrun.loadFile()
 
-            if self.file.livesplit_host != self.ls_host.get() or self.file.livesplit_port != int(self.ls_port.get()):
-                if self.ls_host.get() != "": self.file.livesplit_host = self.ls_host.get()
-                if self.ls_port.get() != "": self.file.livesplit_port = int(self.ls_port.get())
-                self.speedrun._state = "reconnect"
-
-        else:
-            # Open from closed state.
-            self.speedrun.active = False
-            self.loadSettings()
-            self.osd_frm.lower(self.background)
-            self.power_btn.state(False)
-            self.power_btn.disable()
-            self.led_1.disable()
-            self.led_2_last = self.led_2.current_image
-            self.led_2.changeImage(3)
-            self.led_2.disable()
-            self.set_defaults_btn.enable()
-            while self.settings.winfo_width() < 176:
-                if self.settings.winfo_width() + 6 > 176:
-                    self.settings.configure(width=176)
-                    self.settings_bg.place_configure(x=0)
-                    self.settings.update()
-                    break
-                self.settings.configure(width=self.settings.winfo_width() + 6)
-                self.settings_bg.place_configure(x=self.settings_bg.winfo_x() + 6)
-                self.settings.update()
-        return
+        host = self.ls_host.get() if self.ls_host.get() != "" else self.file.livesplit_host
+        port = int(self.ls_port.get()) if self.ls_port.get() != "" else self.file.livesplit_port
+        if host != self.file.livesplit_host or port != self.file.livesplit_port:
+            self.file.livesplit_host, self.file.livesplit_port = host, port
+            self.speedrun._state = "reconnect"
 
     def activeFlip(self):
-        if self.settings.winfo_width() < 11:
+        if not self._settings_open:
             if not self.speedrun.active:
                 self.speedrun.active = True
                 self.osd_frm.lift(self.background)
@@ -378,13 +461,13 @@ class GUI(Windowable):
             nonlocal done
             self.reset_key.unbind("<Button-1>", click_id)
             self.reset_key.unbind("<FocusOut>", focus_id)
-            keyboard.unhook(key_hook)
+            platformInput.unhookKeys(key_hook)
             self.reset_key.config(text=lastkey)
             done = "Cancel"
 
         def do_it(event):
             nonlocal lastkey, hotkey, done
-            if event.event_type == keyboard.KEY_UP:
+            if event.event_type == platformInput.KEY_UP:
                 done = True
                 return
             elif lastkey != event.name:
@@ -397,7 +480,7 @@ class GUI(Windowable):
 
         self.reset_key.config(text="PRESS")
 
-        key_hook = keyboard.hook(do_it, True)
+        key_hook = platformInput.hookKeys(do_it, True)
         click_id = self.reset_key.bind_all("<Button-1>", cancel)
         focus_id = self.reset_key.bind_all("<FocusOut>", cancel)
         while not done:
@@ -430,27 +513,10 @@ class GUI(Windowable):
         self.loadSettings()
 
     def load_patterns(self, patterns=None):
-        [child.destroy() for child in self.scroll_test.inner.winfo_children()]
-        if patterns is not None:
-            chklst = CheckList(self.scroll_test.inner, None, "Running", "Running", "#214449",
-                               self.checkbox_true, self.checkbox_false)
-            chklst.name = "RT:Running"
-            chklst.checkbtn.disable()
-            chklst.grid(row=0, column=0, pady=0, sticky=tk.W)
-            for p in range(0, len(patterns)):
-                chklst = CheckList(self.scroll_test.inner, patterns[p], patterns[p]["name"], patterns[p]["name"][3:], "#214449",
-                                   self.checkbox_true, self.checkbox_false)
-                chklst.grid(row=p+1, column=0, pady=0, sticky=tk.W)
-                self._last_pattern = chklst
+        self.pattern_list.load(patterns)
 
     def highlight_pattern(self, pattern=None):
-        if pattern == None:
-            self._last_pattern.lbl.config(bg="#214449", fg="#5bc8c8")
-        for child in self.scroll_test.inner.winfo_children():
-            if type(child) == CheckList and child.name == pattern:
-                self._last_pattern.lbl.config(bg="#214449", fg="#5bc8c8")
-                child.lbl.config(bg="#5bc8c8", fg="#214449")
-                self._last_pattern = child
+        self.pattern_list.highlight(pattern)
 
     def loadFile(self):
         filename = filedialog.askopenfilename(initialdir=".", title="Select file",
@@ -468,20 +534,21 @@ class GUI(Windowable):
             else:
                 self.file.pattern_file = ""
                 self.file_lbl.config(text="Incompatible File")
-                self.status_lbl.config(text="No patterns loaded")
-                [child.destroy() for child in self.scroll_test.inner.winfo_children()]
+                self.refresher.set(self.status_lbl, text="No patterns loaded")
+                self.load_patterns()
 
     def progress_function(self, stream, chunk, bytes_remaining):
         print(round((1-bytes_remaining/stream.filesize)*100, 3), '% done...')
 
     def loadVideo(self):
         #### DEVELOPER OF PYTUBE APPEARS TO HAVE STEPPED DOWN. PACKAGE MAY STOP WORKING AT ANY TIME ####
-        url = simpledialog.askstring("Input", "Video URL",
-                                parent=application_window)
-        save_path = tkFileDialog.asksaveasfile(mode='w')
+        from tkinter import simpledialog
+        url = simpledialog.askstring("Input", "Video URL", parent=self)
+        save_path = filedialog.askdirectory(title="Save video to")
 
         if url:
             try:
+                from pytube import YouTube     # Slow to import, and only needed here.
                 yt = YouTube(url, on_progress_callback=self.progress_function).streams.get_highest_resolution().download(save_path)
             except:
                 print('You really like breaking things, don\'t you?')
@@ -491,10 +558,82 @@ class GUI(Windowable):
     def on_exit(self):
         self.closing = True
 
-    def updateFPS(self, fps, fpms):
-        self.fps_lbl.configure(text=f"{fps:02.0f} / {fpms:02.0f}")
-        self.update()
+    def storePosition(self):
+        self.file.window_position = f"+{self.winfo_x()}+{self.winfo_y()}"
+
+    def showLivesplitLost(self):
+        self.setLED(self.led_1, 3)
+        self.setLED(self.led_2, 3)
+        self.colorPower(2)
+        self.load_btn.disable()
+        self.load_patterns()
+
+    def showLivesplitFound(self):
+        self.setLED(self.led_2, 0)
+        self.colorPower(1)
+        self.load_btn.enable()
+        if self.file.pattern_file != "": self.load_patterns(self.file.all_patterns)
+
+    def showInactive(self):
+        self.setLED(self.led_1, 3)
+
+    def showActive(self):
+        self.setLED(self.led_1, self.leds[0][3])
+
+    def setLED(self, led, img_number):     # A switched-off LED only remembers its image until enabled again.
+        if led.enabled: led.changeImage(img_number)
+        else: led.current_image = img_number
+
+    def colorPower(self, color):
+        self.power_skin.directSetImages(normal_img=self.power_images.images()[color])
+        self.power_skin2.directSetImages(active_img=self.power_images.images()[color])
+        updateHover(self.power_btn)
+
+    def colorLED(self, color):
+        self.setLED(self.leds[0][0], color)
+        self.colorPower(int(color/2))
+        self.leds[0][3] = color
+
+    def signalDetection(self, state_changed=False):
+        if state_changed:
+            self.leds[0][0].disable()
+            self.blink(0, 7, True)
+        else: self.blink(0, 6)
+
+    def signalCommand(self):
+        self.blink(1, 6)
+
+    def blink(self, led, toggles, restart=False):    # Runs on Tk timers; the detection loop only starts it.
+        if self._settings_open or self.leds[led][1] and not restart:
+            return
+        if self.leds[led][2] is not None:
+            self.after_cancel(self.leds[led][2])
+        self.leds[led][1] = toggles
+        self.leds[led][2] = self.after(0, self._blinkStep, led)
+
+    def stopBlinking(self):
+        for led in self.leds:
+            if led[2] is not None:
+                self.after_cancel(led[2])
+            led[1], led[2] = 0, None
+
+    def _blinkStep(self, led):
+        widget = self.leds[led][0]
+        widget.disable() if widget.enabled else widget.enable()
+        self.leds[led][1] -= 1
+        self.leds[led][2] = self.after(self.blink_interval, self._blinkStep, led) if self.leds[led][1] else None
+
+    def updateFPS(self, loop_timer):
+        if loop_timer.summaries != self._fps_shown:    # Only rebuild the label text when the figures change.
+            self._fps_shown = loop_timer.summaries
+            self.refresher.set(self.fps_lbl, text=f"{loop_timer.fps:02.0f} / {loop_timer.p99 * 1000:02.0f}ms")
+        if self.refresher.flush():     # Widgets and Tk events are serviced at the refresh rate, not the loop rate.
+            super().update()
 
     def updateStatus(self, txt):
-        self.status_lbl.configure(text=str(txt)[:22])
-        print(txt)
+        self.refresher.set(self.status_lbl, text=str(txt)[:22])
+        self.refresher.log(txt)
+
+    def update(self):
+        self.refresher.flush(force=True)
+        super().update()
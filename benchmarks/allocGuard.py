@@ -0,0 +1,149 @@
+import os
+import sys
+import argparse
+import tracemalloc
+from array import array
+from types import SimpleNamespace
+from benchSupport import REPO, loadPatternFile, paintTest, scratchDir
+import cv2
+import numpy
+from confighandler import fileAccess
+from screenMonitoring import ImageSource, ScreenSource
+from splitterCore import LivesplitClient, autoSplitter
+from livesplitEmulator import LivesplitEmulator
+from headless import HeadlessView
+
+# Fails (exit status 1) when the steady-state detection loop allocates. A generated run of frames is replayed
+# through the real autoSplitter under tracemalloc, once from recorded color frames (ImageSource) and once through
+# ScreenSource.convert() with mss replaced by crops of the same frames. Once a state has settled, each of `--frames`
+# iterations is measured on its own: memory it kept, and how far its allocations rose above where it started.
+# A buffer allocated and freed every iteration shows in every iteration's rise, so the median catches it; the
+# rise already includes ~1.5 KB of numpy views and scalars from matchPattern(), so allocations smaller than the
+# remaining headroom (a single short row, say) are not resolved.
+#   python benchmarks/allocGuard.py
+#   python benchmarks/allocGuard.py clustertruck.cfg --frames 2000 --verbose
+# mss itself returns a new buffer from each grab; that allocation is outside the loop's control and not measured.
+# There is no test suite to hold this check, so run it before merging any change to the detection loop.
+
+
+class StubScreen(ScreenSource):     # The live capture path, with mss.grab() replaced by prepared BGRA crops.
+    def __init__(self, frames):
+        super().__init__()
+        self.frames = frames
+        self.index = 0
+        self._shots = {}
+
+    def advance(self):
+        self.index += 1
+        return self.index < len(self.frames)
+
+    def capture(self, area):
+        frame = self.frames[self.index]
+        key = (id(frame), area["top"], area["left"], area["width"], area["height"])
+        shot = self._shots.get(key)
+        if shot is None:     # Built once per distinct frame and area, during warmup.
+            crop = frame[area["top"]:area["top"] + area["height"], area["left"]:area["left"] + area["width"]]
+            shot = self._shots[key] = SimpleNamespace(raw=crop.tobytes(), width=crop.shape[1], height=crop.shape[0])
+        return shot
+
+
+class GuardView(HeadlessView):
+    def __init__(self, speedrun, states, warmup, frames, verbose=False):
+        super().__init__(quiet=True, fps_interval=0)
+        self.speedrun = speedrun
+        self.states = states
+        self.warmup = warmup
+        self.frames = frames
+        self.verbose = verbose
+        self.results = {}
+        self._state = None
+        self._count = 0
+        self._rises = array("q", bytes(8 * frames))     # Preallocated, so recording a frame allocates nothing.
+        self._start = 0
+
+    def updateFPS(self, loop_timer):    # Last call of each loop iteration, so also the start of the next.
+        current, peak = tracemalloc.get_traced_memory()
+        state = self.speedrun._state
+        if state != self._state:
+            self._state, self._count = state, 0
+        self._count += 1
+        measured = self._count - self.warmup
+        if state in self.states and state not in self.results:
+            if measured == 0:
+                self._snapshot = tracemalloc.take_snapshot() if self.verbose else None
+                self._base = current
+            elif 0 < measured <= self.frames:
+                self._rises[measured - 1] = peak - self._start
+            if measured == self.frames:
+                top = tracemalloc.take_snapshot().compare_to(self._snapshot, "lineno") if self.verbose else []
+                rises = sorted(self._rises)
+                self.results[state] = ((current - self._base) / self.frames, rises[len(rises) // 2], rises[-1], top)
+        tracemalloc.reset_peak()
+        self._start = tracemalloc.get_traced_memory()[0]
+
+
+def guardRun(pattern_file, warmup, frames, live=False, verbose=False):
+    groups, screens = loadPatternFile(pattern_file)
+    height = max(s["top"] + s["height"] for s in screens.values())
+    width = max(s["left"] + s["width"] for s in screens.values())
+    blank = numpy.zeros((height, width), numpy.uint8)
+    select = blank.copy()
+    paintTest(select, screens["prerun"], [t for t in groups["prerun"] if t["action"] != "STANDBY"][0])
+    complete = blank.copy()
+    paintTest(complete, screens["runtime"], [t for t in groups["runtime"] if "split" in t["action"]][0])
+    color = cv2.COLOR_GRAY2BGRA if live else cv2.COLOR_GRAY2BGR     # As mss and as recordings deliver them.
+    blank, select, complete = [cv2.cvtColor(f, color) for f in (blank, select, complete)]
+    steady = warmup + frames + 10
+    run = [blank] * 20 + [select] * 20 + [blank] * steady + [complete] * steady + [blank] * 10
+
+    pattern_file = os.path.abspath(pattern_file)
+    with scratchDir("splitrp_alloc_"), LivesplitEmulator(port=0) as emulator:
+        livesplit = LivesplitClient()
+        speedrun = autoSplitter(livesplit, StubScreen(run) if live else ImageSource(run))
+        speedrun.save_on_exit = False
+        file = fileAccess(speedrun, pattern_file)
+        file.lock_to_window = False
+        file.autoclicker_active = False
+        file.false_split_period = 0.0
+        file.watch_patterns = False
+        file.livesplit_host, file.livesplit_port = emulator.host, emulator.port
+        view = GuardView(speedrun, ("running", "pause"), warmup, frames, verbose)
+        tracemalloc.start(10 if verbose else 1)
+        speedrun.mainloop(file, view)
+        tracemalloc.stop()
+    return view.results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check that the steady-state detection loop does not allocate.")
+    parser.add_argument("pattern_file", nargs="?", default=os.path.join(REPO, "clustertruck.cfg"))
+    parser.add_argument("--frames", type=int, default=1000, help="Iterations measured per state. (default: 1000)")
+    parser.add_argument("--warmup", type=int, default=50, help="Iterations skipped after entering a state.")
+    parser.add_argument("--kept", type=float, default=16.0, help="Bytes per frame that may stay allocated. (16)")
+    parser.add_argument("--rise", type=int, default=2048,
+                        help="Bytes the median iteration may allocate above its starting point. (2048)")
+    parser.add_argument("--transient", type=int, default=64 * 1024,
+                        help="Bytes any one iteration may allocate above its starting point. (65536)")
+    parser.add_argument("--verbose", action="store_true", help="List the lines that kept the most memory.")
+    args = parser.parse_args(argv)
+
+    failed = 0
+    print(f"{'source':8s} {'state':8s} {'kept B/frame':>13s} {'median rise B':>14s} {'max rise B':>11s}")
+    for source, live in (("image", False), ("screen", True)):
+        results = guardRun(args.pattern_file, args.warmup, args.frames, live, args.verbose)
+        for state in ("running", "pause"):
+            if state not in results:
+                print(f"{source:8s} {state:8s} {'not reached':>13s}")
+                failed += 1
+                continue
+            kept, rise, worst, top = results[state]
+            over = kept > args.kept or rise > args.rise or worst > args.transient
+            failed += over
+            print(f"{source:8s} {state:8s} {kept:13.1f} {rise:14d} {worst:11d}  {'OVER BUDGET' if over else 'ok'}")
+            for stat in top[:10]:
+                print(f"    {stat}")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
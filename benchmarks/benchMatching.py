@@ -0,0 +1,109 @@
+import os
+import sys
+import argparse
+from benchSupport import REPO, loadPatternFile, synthesizeRow, syntheticTest, noiseFrame, rowWidth, timeCall, \
+    writeResults, compareResults
+from screenMonitoring import getRow, matchPattern, detectEdges, detectSolid, openSource
+
+# Micro-benchmarks for the scanline kernels. Run before and after an engine change:
+#   python benchmarks/benchMatching.py --save before.json
+#   python benchmarks/benchMatching.py --compare before.json
+
+
+def benchKernels(results, min_time):
+    print("\n--- Kernels on synthetic rows ---")
+    print(f"{'case':44s} {'getRow':>12s} {'match hit':>12s} {'match miss':>12s} {'edges':>12s} {'solids':>12s}")
+    for width in (128, 512, 2048):
+        for n_edges in (2, 8, 32):
+            for soften in (1, 4, 8):
+                for limit in (1, 15, 200):
+                    if limit >= width // 2: continue
+                    test = syntheticTest(width, n_edges, soften, limit)
+                    origin, edges, solids, max_x, soft = test["properties"]
+                    hit, ok = synthesizeRow(test["properties"], width)
+                    if not ok: continue
+                    miss = hit.copy()
+                    miss[0, limit // 2:] = 255 - solids[0]     # Opposing pixel found, every feature fails.
+                    frame = noiseFrame(1, width)
+                    cropped = hit[:, limit // 2:]
+
+                    case = f"w{width} e{n_edges} s{soften} m{limit}"
+                    row = {"getRow": timeCall(lambda: getRow(frame, test["area"], 127), min_time),
+                           "match_hit": timeCall(lambda: matchPattern(hit, test["properties"]), min_time),
+                           "match_miss": timeCall(lambda: matchPattern(miss, test["properties"]), min_time),
+                           "edges": timeCall(lambda: detectEdges(cropped, edges, soften, 0), min_time),
+                           "solids": timeCall(lambda: detectSolid(cropped, solids[1:], solids[0], 0), min_time)}
+                    for key, value in row.items():
+                        results[f"kernel/{case}/{key}"] = value
+                    print(f"{case:44s} " + " ".join(f"{1 / v:10.0f}/s" for v in row.values()))
+
+
+def benchPatternFile(results, path, min_time, frames=None):
+    groups, screens = loadPatternFile(path)
+    name = os.path.basename(path)
+    print(f"\n--- {name} ---")
+    print(f"{'test':44s} {'tests/sec hit':>14s} {'tests/sec miss':>15s}")
+    for group, tests in groups.items():
+        frame = noiseFrame(screens[group]["height"], screens[group]["width"])
+        for test in tests:
+            hit, ok = synthesizeRow(test["properties"], rowWidth(test))
+            hit_time = timeCall(lambda: matchPattern(hit, test["properties"]), min_time) if ok else None
+            miss_time = timeCall(lambda: matchPattern(getRow(frame, test["area"], test["threshold"]),
+                                                      test["properties"]), min_time)
+            results[f"{name}/{test['name']}/hit"] = hit_time
+            results[f"{name}/{test['name']}/miss"] = miss_time
+            print(f"{test['name']:44s} " + (f"{1 / hit_time:12.0f}/s " if ok else f"{'n/a':>14s} ")
+                  + f"{1 / miss_time:13.0f}/s")
+
+        def fullFrame():     # Nothing matches, so every enabled test runs: the per-frame worst case.
+            for test in tests:
+                if test["enabled"]:
+                    matchPattern(getRow(frame, test["area"], test["threshold"]), test["properties"])
+        cost = timeCall(fullFrame, min_time)
+        results[f"{name}/{group}/frame"] = cost
+        print(f"{'  per-frame cost, ' + group:44s} {cost * 1e6:12.1f} us  ({1 / cost:.0f} frames/s)")
+
+        if frames is not None:
+            rows = []
+            source = openSource(frames)
+            while len(rows) < 200:
+                shot = source.grab(screens[group])
+                rows += [(getRow(shot, t["area"], t["threshold"]), t["properties"]) for t in tests]
+                if not source.advance(): break
+
+            def recorded():
+                for row, properties in rows:
+                    matchPattern(row, properties)
+            cost = timeCall(recorded, min_time) / max(1, len(rows))
+            results[f"{name}/{group}/recorded"] = cost
+            print(f"{'  recorded rows, ' + group:44s} {1 / cost:12.0f} tests/s over {len(rows)} rows")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark getRow, matchPattern, detectEdges and detectSolid.")
+    parser.add_argument("patterns", nargs="*", default=[os.path.join(REPO, "clustertruck.cfg"),
+                                                       os.path.join(REPO, "cluster_roulette.cfg")])
+    parser.add_argument("--frames", help="Recorded full-screen frames (video, image directory or .rpa archive).")
+    parser.add_argument("--min-time", type=float, default=.2, help="Seconds to spend timing each case.")
+    parser.add_argument("--skip-kernels", action="store_true", help="Only benchmark the pattern files.")
+    parser.add_argument("--save", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against results saved with --save.")
+    parser.add_argument("--tolerance", type=float, default=.10, help="Slowdown treated as a regression. (.10)")
+    args = parser.parse_args(argv)
+
+    results = {}
+    if not args.skip_kernels:
+        benchKernels(results, args.min_time)
+    for path in args.patterns:
+        benchPatternFile(results, path, args.min_time, args.frames)
+    if args.save:
+        writeResults(args.save, "matching", results)
+    if args.compare:
+        print(f"\n--- Compared to {args.compare} (seconds per call) ---")
+        if compareResults(args.compare, results, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,167 @@
+import os
+import sys
+import time
+import bisect
+import argparse
+from benchSupport import synthesizeRun, writeResults, compareResults, scratchDir
+from confighandler import fileAccess
+from screenMonitoring import openSource, ImageSource
+from splitterCore import LivesplitClient, autoSplitter
+from livesplitEmulator import LivesplitEmulator
+from headless import HeadlessView
+
+# Replays a recorded run through the real autoSplitter and a local LiveSplit emulator, then reports
+# frames per second, loop time per state and how long each split took to reach the timer.
+#   python benchmarks/benchReplay.py clustertruck.cfg run.mp4 --labels run_splits.txt --save replay.json
+# The labels file lists, one per line, the frame index where each split screen first appears.
+
+
+class TimedSource:      # Wraps a frame source and records when each frame became current.
+    def __init__(self, source):
+        self.source = source
+        self.presented = [time.perf_counter_ns()]
+
+    def start(self): self.presented[0] = time.perf_counter_ns()
+
+    def advance(self):
+        if not self.source.advance():
+            return False
+        self.presented.append(time.perf_counter_ns())
+        return True
+
+    def grab(self, area, out=None): return self.source.grab(area, out)
+
+    def capture(self, area): return self.source.capture(area)
+
+    def convert(self, shot, out=None): return self.source.convert(shot, out)
+
+    def time(self): return self.source.time()
+
+
+class BenchView(HeadlessView):
+    def __init__(self, speedrun, source):
+        super().__init__(quiet=True, fps_interval=0)
+        self.speedrun = speedrun
+        self.source = source
+        self.loops = {}
+        self._state = speedrun._state
+
+    def updateFPS(self, loop_timer):    # Last call of each loop iteration; the next begins once the frame advances.
+        self.loops.setdefault(self._state, []).append(time.perf_counter_ns() - self.source.presented[-1])
+        self._state = self.speedrun._state
+
+
+def readLabels(path):
+    frames = []
+    with open(path) as f:
+        for line in f:
+            line = line.split("#")[0].strip()
+            if line:
+                frames.append(int(line.split(",")[0]))
+    return sorted(frames)
+
+
+def percentile(values, p):
+    values = sorted(values)
+    return values[min(len(values) - 1, int(len(values) * p))] if values else 0
+
+
+def replay(pattern_file, frames, labels=None, false_split_period=None):
+    pattern_file = os.path.abspath(pattern_file)
+    with scratchDir("splitrp_replay_"), LivesplitEmulator(port=0) as emulator:
+        source = TimedSource(frames)
+        livesplit = LivesplitClient()
+        speedrun = autoSplitter(livesplit, source)
+        speedrun.save_on_exit = False
+        file = fileAccess(speedrun, pattern_file)
+        if not file.pattern_loaded:
+            raise ValueError(f"Unable to load pattern file: {pattern_file}")
+        file.lock_to_window = False
+        file.autoclicker_active = False
+        file.watch_patterns = False
+        file.livesplit_host, file.livesplit_port = emulator.host, emulator.port
+        if false_split_period is not None:
+            file.false_split_period = false_split_period
+        view = BenchView(speedrun, source)
+
+        source.start()
+        began = time.perf_counter()
+        speedrun.mainloop(file, view)
+        elapsed = time.perf_counter() - began
+        time.sleep(.1)      # Let the emulator finish reading the last commands.
+        splits = emulator.received("split")
+
+    results = {"frames": len(source.presented), "seconds": elapsed,
+               "frames_per_second": len(source.presented) / elapsed, "splits": len(splits)}
+    print(f"Frames: {results['frames']}  in {elapsed:.2f}s  ({results['frames_per_second']:.1f} frames/s)")
+
+    print(f"\n{'state':10s} {'loops':>8s} {'mean us':>10s} {'p50 us':>10s} {'p99 us':>10s} {'max us':>10s}")
+    for state, loops in sorted(view.loops.items(), key=lambda item: str(item[0])):
+        mean = sum(loops) / len(loops)
+        print(f"{str(state):10s} {len(loops):8d} {mean / 1e3:10.1f} {percentile(loops, .5) / 1e3:10.1f} "
+              f"{percentile(loops, .99) / 1e3:10.1f} {max(loops) / 1e3:10.1f}")
+        results[f"loop/{state}/mean_us"] = mean / 1e3
+        results[f"loop/{state}/p99_us"] = percentile(loops, .99) / 1e3
+
+    # Match the n-th split received to the n-th labeled split frame. Without labels, measure from the frame
+    # that was current when the split arrived, which leaves only the loop and socket delay.
+    print(f"\n{'split':>5s} {'shown':>7s} {'sent':>7s} {'frames late':>12s} {'delay ms':>10s}")
+    delays = []
+    for n, (wall_ns, perf_ns, client, command, response) in enumerate(splits):
+        sent = max(0, bisect.bisect_right(source.presented, perf_ns) - 1)
+        shown = labels[n] if labels is not None and n < len(labels) else sent
+        if shown >= len(source.presented):
+            continue
+        delay = (perf_ns - source.presented[shown]) / 1e6
+        delays.append(delay)
+        print(f"{n + 1:5d} {shown:7d} {sent:7d} {sent - shown:12d} {delay:10.2f}")
+    if labels is not None and len(labels) != len(splits):
+        print(f"Warning: {len(labels)} labeled splits, {len(splits)} splits received.")
+    if delays:
+        results["split_delay_mean_ms"] = sum(delays) / len(delays)
+        results["split_delay_max_ms"] = max(delays)
+        print(f"\nFrame-to-split delay: mean {results['split_delay_mean_ms']:.2f} ms, "
+              f"max {results['split_delay_max_ms']:.2f} ms")
+    return results
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded run and measure frame-to-split latency.")
+    parser.add_argument("pattern_file")
+    parser.add_argument("recording", nargs="?", help="Video file, frame directory or .rpa archive of a full run.")
+    parser.add_argument("--synthetic", type=int, metavar="LEVELS",
+                        help="Replay a generated run with this many level completions instead of a recording.")
+    parser.add_argument("--labels", help="Frame indexes where each split screen first appears.")
+    parser.add_argument("--realtime", action="store_true", help="Present frames at the recording's frame rate.")
+    parser.add_argument("--rate", type=float, default=60.0, help="Frame rate of image sources. (default: 60)")
+    parser.add_argument("--false-split-period", type=float,
+                        help="Override false_split_period. Unpaced replays should use 0.")
+    parser.add_argument("--save", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against results saved with --save.")
+    parser.add_argument("--tolerance", type=float, default=.10)
+    args = parser.parse_args(argv)
+
+    save = os.path.abspath(args.save) if args.save else None
+    compare = os.path.abspath(args.compare) if args.compare else None
+    labels = readLabels(args.labels) if args.labels else None
+    if args.synthetic:
+        frames, labels = synthesizeRun(args.pattern_file, args.synthetic)
+        source = ImageSource(frames, args.realtime, args.rate)
+    elif args.recording:
+        source = openSource(args.recording, args.realtime, args.rate)
+    else:
+        parser.error("a recording or --synthetic is required")
+    period = args.false_split_period if args.false_split_period is not None or args.realtime else 0.0
+    results = replay(args.pattern_file, source, labels, period)
+    if save:
+        writeResults(save, "replay", results)
+    if compare:
+        print(f"\n--- Compared to {args.compare} ---")
+        results = {k: v for k, v in results.items() if k not in ("frames", "splits", "frames_per_second")}
+        if compareResults(compare, results, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,81 @@
+import os
+import sys
+import time
+import argparse
+import configparser
+from benchSupport import REPO, timeCall
+from confighandler import stringToClicks, planRoulette, rouletteTimes
+
+# Roulette navigation: clicks and seconds the planned routes need to reach each level, against the largest-jump
+# choice splitterCore made before, averaged over the page positions a run can be on.
+#   python benchmarks/benchRoulette.py
+#   python benchmarks/benchRoulette.py cluster_roulette.cfg --levels
+
+
+# ---Functions---
+
+def greedyClicks(current, level, page_clicks, clicks):     # Clicks the old rouletteMax() loop sent, and its end page.
+    def largest(possibles):
+        for click in possibles[::-1]:
+            if current + click[0] <= level:
+                return click[0]
+        return possibles[0][0]
+
+    sent = 0
+    while level <= current or level > current + clicks[-1][0]:
+        current += largest(page_clicks)
+        sent += 1
+        if sent > 1000:
+            return None, current
+    return sent + 2, current
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Compare planned roulette navigation with the old greedy choice.")
+    parser.add_argument("pattern_file", nargs="?", default=os.path.join(REPO, "cluster_roulette.cfg"))
+    parser.add_argument("--levels", action="store_true", help="List every level.")
+    args = parser.parse_args(argv)
+
+    cfg = configparser.ConfigParser(inline_comment_prefixes="#")
+    with open(args.pattern_file) as f:
+        cfg.read_file(f)
+    roulette = cfg["Roulette"]
+    total = int(roulette["levels"])
+    page_clicks = sorted(stringToClicks(roulette["page_clicks"]), key=lambda click: click[0])
+    clicks = sorted(stringToClicks(roulette["clicks"]), key=lambda click: click[0])
+    delay = float(roulette["click_delay"])
+
+    began = time.perf_counter()
+    plan = planRoulette(total, page_clicks, clicks)
+    built = time.perf_counter() - began
+    lookup = timeCall(lambda: plan[40][total // 2])
+    times = rouletteTimes(plan, page_clicks, delay)
+
+    positions = [0]
+    for position in positions:
+        for click in page_clicks:
+            step = position + click[0]
+            if 0 <= step < total and step not in positions: positions.append(step)
+
+    print(f"{total} levels, {len(page_clicks)} page clicks, {len(clicks)} level clicks, {delay:.2f} s apart")
+    print(f"Plan built in {built * 1e3:.1f} ms, {lookup * 1e9:.0f} ns per lookup\n")
+    if args.levels:
+        print(f"{'level':>5s} {'greedy clicks':>14s} {'planned clicks':>15s} {'planned s':>10s}")
+    greedy_total = planned_total = 0.0
+    for level in range(1, total + 1):
+        greedy = [greedyClicks(p, level, page_clicks, clicks)[0] for p in positions]
+        greedy = sum(greedy) / len(greedy) if None not in greedy else None
+        planned = times[level] / delay if times[level] is not None else None
+        greedy_total += greedy or 0
+        planned_total += planned or 0
+        if args.levels:
+            print(f"{level:5d} {'-' if greedy is None else f'{greedy:.2f}':>14s} "
+                  f"{'-' if planned is None else f'{planned:.2f}':>15s} "
+                  f"{'-' if planned is None else f'{times[level]:.2f}':>10s}")
+    print(f"Average per level: greedy {greedy_total / total:.2f} clicks ({greedy_total / total * delay:.2f} s), "
+          f"planned {planned_total / total:.2f} clicks ({planned_total / total * delay:.2f} s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
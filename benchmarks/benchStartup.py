@@ -0,0 +1,110 @@
+import os
+import sys
+import time
+import argparse
+import tempfile
+import subprocess
+from benchSupport import REPO, loadPatternFile, paintTest, writeResults, compareResults
+import cv2
+import numpy
+from livesplitEmulator import LivesplitEmulator
+
+# Cold-start costs: what importing the app's modules costs (python -X importtime), and how long a fresh
+# headless process takes from launch to its first pattern detection.
+#   python benchmarks/benchStartup.py --save startup.json
+#   python benchmarks/benchStartup.py --compare startup.json
+
+
+def importTimes(modules):      # {module: (self us, cumulative us)} and the total, from one cold interpreter.
+    out = subprocess.run([sys.executable, "-X", "importtime", "-c", "import " + ", ".join(modules)], cwd=REPO,
+                         capture_output=True, text=True)
+    if out.returncode:
+        raise RuntimeError(out.stderr.strip().splitlines()[-1])
+    times, total = {}, 0
+    for line in out.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        own, cumulative, name = line[len("import time:"):].split("|")
+        times[name.strip()] = (int(own), int(cumulative))
+        if not name[1:].startswith(" "):    # Top-level imports; their cumulative times add up to the total.
+            total += int(cumulative)
+    return times, total
+
+
+def firstDetection(pattern_file, timeout=30.0):   # Seconds from launching headless.py to its first detection.
+    groups, screens = loadPatternFile(pattern_file)
+    height = max(s["top"] + s["height"] for s in screens.values())
+    width = max(s["left"] + s["width"] for s in screens.values())
+    frame = numpy.zeros((height, width), numpy.uint8)
+    paintTest(frame, screens["prerun"], [t for t in groups["prerun"] if t["action"] != "STANDBY"][0])
+    with tempfile.TemporaryDirectory(prefix="splitrp_startup_") as run_dir:     # Also holds settings.cfg, falsies/.
+        os.makedirs(os.path.join(run_dir, "frames"))
+        for n in range(100):
+            cv2.imwrite(os.path.join(run_dir, "frames", f"{n:04d}.png"), frame)
+
+        with LivesplitEmulator(port=0) as emulator:
+            began = time.perf_counter()
+            process = subprocess.Popen([sys.executable, "-u", os.path.join(REPO, "headless.py"),
+                                        os.path.abspath(pattern_file), "--source", "frames", "--host", emulator.host,
+                                        "--port", str(emulator.port)], cwd=run_dir, stdout=subprocess.PIPE, text=True)
+            try:
+                for line in process.stdout:
+                    if "detect" in line.split():
+                        return time.perf_counter() - began
+                    if time.perf_counter() - began > timeout:
+                        break
+            finally:
+                process.kill()
+                process.wait()
+                process.stdout.close()
+    return None
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure import time and time to first detection.")
+    parser.add_argument("pattern_file", nargs="?", default=os.path.join(REPO, "clustertruck.cfg"))
+    parser.add_argument("--modules", default="GUI_v2,splitterCore,confighandler",
+                        help="Modules imported at launch. (default: main_6.py's imports)")
+    parser.add_argument("--repeat", type=int, default=5, help="Runs of each measurement; the fastest counts.")
+    parser.add_argument("--top", type=int, default=15, help="Slowest modules to list.")
+    parser.add_argument("--save", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against results saved with --save.")
+    parser.add_argument("--tolerance", type=float, default=.15)
+    args = parser.parse_args(argv)
+
+    modules = [m.strip() for m in args.modules.split(",")]
+    try:
+        runs = [importTimes(modules) for n in range(args.repeat)]
+    except RuntimeError as e:
+        print(f"Unable to import {', '.join(modules)}: {e}")
+        return 1
+    times, total = min(runs, key=lambda run: run[1])
+    results = {"import_ms": total / 1e3}
+    print(f"--- import {', '.join(modules)}: {total / 1e3:.1f} ms ---")
+    print(f"{'module':40s} {'self ms':>9s} {'cumulative ms':>14s}")
+    for name, (own, cumulative) in sorted(times.items(), key=lambda item: -item[1][0])[:args.top]:
+        print(f"{name:40s} {own / 1e3:9.1f} {cumulative / 1e3:14.1f}")
+    for name in modules:
+        if name in times:
+            results[f"import/{name}_ms"] = times[name][1] / 1e3
+
+    detections = [firstDetection(args.pattern_file) for n in range(args.repeat)]
+    detections = [d for d in detections if d is not None]
+    if detections:
+        results["first_detection_ms"] = min(detections) * 1e3
+        print(f"\nLaunch to first detection (headless): {results['first_detection_ms']:.0f} ms "
+              f"(fastest of {len(detections)})")
+    else:
+        print("\nNo detection reached.")
+
+    if args.save:
+        writeResults(args.save, "startup", results)
+    if args.compare:
+        print(f"\n--- Compared to {args.compare} ---")
+        if compareResults(args.compare, results, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,160 @@
+import os
+import sys
+import json
+import time
+import tempfile
+import contextlib
+import subprocess
+import configparser
+
+# Shared helpers for the benchmark scripts: repo imports, pattern loading at the file's own scale,
+# synthetic rows that satisfy a pattern, a self-calibrating timer, result files for comparisons, and a scratch
+# working directory for runs that go through fileAccess.
+
+REPO = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+if REPO not in sys.path:
+    sys.path.insert(0, REPO)
+
+import numpy
+from confighandler import patternToDict, repackScreen, convertResolution
+from screenMonitoring import matchPattern
+
+
+# ---Functions---
+
+def loadPatternFile(path, resize_to=None, translation=(0, 0)):
+    # Pattern groups without touching settings.cfg. At original scale and origin unless either is given.
+    cfg = configparser.ConfigParser(inline_comment_prefixes="#")
+    with open(path) as f:
+        cfg.read_file(f)
+    groups = {"runtime": [patternToDict(n, cfg, "RT") for n in cfg["Tests"]["runtime"].split(",")],
+              "prerun": [patternToDict(n, cfg, "PR") for n in cfg["Tests"]["prerun"].split(",")],
+              "standby": [patternToDict(n, cfg, "SB") for n in cfg["Tests"]["standby"].split(",")]}
+    screens = {"runtime": repackScreen(cfg["Screenshot Areas"]["runtime"]),
+               "prerun": repackScreen(cfg["Screenshot Areas"]["prerun"])}
+    if resize_to is not None or tuple(translation) != (0, 0):
+        original = [int(n) for n in cfg["General Properties"]["original_scale"].replace(" ", "").split(",")]
+        convertResolution(list(screens.values()), [t for g in groups.values() for t in g], original,
+                          list(resize_to or original), tuple(translation))
+    screens["standby"] = screens["prerun"]
+    return groups, screens
+
+
+def rowWidth(test): return abs(test["area"][2] - test["area"][0])
+
+
+def synthesizeRow(properties, width):   # A thresholded row that matchPattern() accepts for these properties.
+    origin, edges, solids, limit, soften = properties
+    shade, other = solids[0], 255 - solids[0]
+    lead = max(0, limit // 2)
+    new_origin = origin[0]
+    reach = max([new_origin + e + soften + 1 for e in edges] + [new_origin + s[0] + s[1] for s in solids[1:]] + [1])
+    row = numpy.full((1, max(width, lead + reach)), other, numpy.uint8)
+
+    row[0, :lead] = shade
+    for start, length in solids[1:]:
+        p = lead + new_origin + start
+        row[0, max(p, lead):p + length] = shade
+    for edge in edges:
+        p = lead + new_origin + edge
+        if p - 1 >= lead:
+            row[0, p - 1] = other
+            row[0, p] = shade
+    for start, length in solids[1:]:
+        p = lead + new_origin + start
+        if p >= lead: row[0, p] = shade
+    row[0, lead] = other
+    row[0, lead + new_origin] = other
+    return row, matchPattern(row, properties)
+
+
+def paintTest(frame, screen, test):      # Draw a test's synthetic row into a full-screen frame, in place.
+    row, ok = synthesizeRow(test["properties"], rowWidth(test))
+    area = test["area"]
+    step = -1 if area[0] > area[2] else 1
+    cols = numpy.arange(screen["width"])[area[0]:area[2]:step]     # Same columns getRow() reads.
+    frame[screen["top"] + area[1], screen["left"] + cols] = row[0, :len(cols)]
+    return ok
+
+
+def synthesizeRun(pattern_file, levels=5, running=60, shown=30):
+    # Frames and labeled split indexes for a run: level select, then `levels` level-complete screens.
+    groups, screens = loadPatternFile(pattern_file)
+    height = max(s["top"] + s["height"] for s in screens.values())
+    width = max(s["left"] + s["width"] for s in screens.values())
+    blank = numpy.zeros((height, width), numpy.uint8)
+    select = blank.copy()
+    paintTest(select, screens["prerun"], [t for t in groups["prerun"] if t["action"] != "STANDBY"][0])
+    complete = blank.copy()
+    paintTest(complete, screens["runtime"], [t for t in groups["runtime"] if "split" in t["action"]][0])
+
+    frames, labels = [blank] * 20 + [select] * 20, []
+    for level in range(levels):
+        frames += [blank] * running
+        labels.append(len(frames))
+        frames += [complete] * shown
+    return frames, labels
+
+
+def syntheticTest(width, n_edges, soften, limit, origin_span=1, shade=0):
+    spacing = max(2, (width - limit - origin_span) // (n_edges + 1))
+    edges = [spacing * (n + 1) for n in range(n_edges)]
+    planes = [[e - spacing + 2, max(1, spacing // 2)] for e in edges]
+    return {"name": f"SYN:w{width}e{n_edges}s{soften}m{limit}", "area": [0, 0, width],
+            "properties": [[0, origin_span], edges, [shade] + planes, limit, soften],
+            "threshold": 127, "action": "", "enabled": True}
+
+
+def noiseFrame(height, width, seed=0):
+    return numpy.random.default_rng(seed).integers(0, 256, (height, width), numpy.uint8)
+
+
+def timeCall(function, min_time=.2):    # Seconds per call, repeating until min_time has elapsed.
+    calls = 1
+    while True:
+        began = time.perf_counter()
+        for n in range(calls):
+            function()
+        elapsed = time.perf_counter() - began
+        if elapsed >= min_time:
+            return elapsed / calls
+        calls = max(calls * 2, int(calls * min_time / max(elapsed, 1e-9)) + 1)
+
+
+@contextlib.contextmanager
+def scratchDir(prefix):     # fileAccess writes settings.cfg and falsies/ to the working directory; run in a temporary one.
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix=prefix, ignore_cleanup_errors=True) as work:    # The archive may be open.
+        os.chdir(work)
+        try:
+            yield work
+        finally:
+            os.chdir(cwd)
+
+
+def gitRevision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=REPO, capture_output=True,
+                              text=True).stdout.strip() or "unknown"
+    except OSError:
+        return "unknown"
+
+
+def writeResults(path, name, results):
+    with open(path, "w") as f:
+        json.dump({"benchmark": name, "revision": gitRevision(), "time": time.time(), "results": results}, f, indent=1)
+
+
+def compareResults(path, results, tolerance=.10, lower_is_better=True):  # Print regressions against a saved run.
+    with open(path) as f:
+        baseline = json.load(f)["results"]
+    regressions = 0
+    for key, value in results.items():
+        if value is None or key not in baseline or not baseline[key]:
+            continue
+        change = (value - baseline[key]) / baseline[key]
+        worse = change > tolerance if lower_is_better else change < -tolerance
+        flag = "REGRESSION" if worse else ""
+        regressions += bool(worse)
+        print(f"{key:60s} {baseline[key]:12.4g} -> {value:12.4g}  {change * 100:+7.1f}%  {flag}")
+    return regressions
@@ -0,0 +1,208 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import multiprocessing
+from benchSupport import loadPatternFile, writeResults, compareResults
+import cv2
+import numpy
+from screenMonitoring import screenTest, ImageSource
+
+# Scores a pattern file against labeled full-screen frames using the real screenTest engine.
+#   python benchmarks/evaluatePatterns.py clustertruck.cfg labeled/ --save eval.json
+#   python benchmarks/evaluatePatterns.py clustertruck.cfg labeled/ --compare eval.json
+# Labeled frames are either sorted into sub-directories named after the pattern each should match
+# ("Level Complete 1", "Credits", ...) or "none", or listed in a CSV of `path, pattern` rows.
+# Every frame is tested against each group (runtime, prerun, standby) the way its screenTest would see it:
+# tests run in file order and the first match wins.
+
+IMAGES = (".png", ".jpg", ".bmp")
+_worker = {}
+
+
+class LabeledFrames(ImageSource):   # Unreadable images become blank frames and are reported, not dropped.
+    def __init__(self, paths, blank):
+        self.blank = blank
+        self.unreadable = []
+        super().__init__(paths)
+
+    def _read(self):
+        path = self.frames[self._next] if self._next < len(self.frames) else None
+        frame = super()._read()
+        if frame is None and path is not None:
+            self.unreadable.append(path)
+            frame = self.blank
+        return frame
+
+
+# ---Functions---
+
+def readLabeled(path):      # [(frame path, section name or None)]
+    labeled = []
+    if os.path.isdir(path):
+        for label in sorted(os.listdir(path)):
+            folder = os.path.join(path, label)
+            if os.path.isdir(folder):
+                labeled += [(os.path.join(folder, n), sectionName(label)) for n in sorted(os.listdir(folder))
+                            if os.path.splitext(n)[1].lower() in IMAGES]
+    else:
+        root = os.path.dirname(os.path.abspath(path))
+        with open(path, newline="") as f:
+            for row in csv.reader(f):
+                if row and not row[0].startswith("#") and len(row) > 1:
+                    labeled.append((os.path.join(root, row[0].strip()), sectionName(row[1])))
+    return labeled
+
+
+def sectionName(label):     # "RT:Credits", "Credits" -> "Credits". "none" or "" -> None.
+    label = label.strip()
+    if label[2:3] == ":" and label[:2] in ("RT", "PR", "SB"):
+        label = label[3:]
+    return None if label.lower() in ("", "none") else label
+
+
+def _initWorker(pattern_file, resize_to, translation, include_disabled):
+    groups, screens = loadPatternFile(pattern_file, resize_to, translation)
+    if include_disabled:
+        for tests in groups.values():
+            for test in tests: test["enabled"] = True
+    _worker["groups"], _worker["screens"] = groups, screens
+
+
+def _evaluateChunk(chunk):     # chunk: [(index, path)] -> ([(index, {group: section or None})], unreadable, seconds)
+    groups, screens = _worker["groups"], _worker["screens"]
+    height = max(s["top"] + s["height"] for s in screens.values())
+    width = max(s["left"] + s["width"] for s in screens.values())
+    source = LabeledFrames([path for index, path in chunk], numpy.zeros((height, width), numpy.uint8))
+    monitors = {group: screenTest(screens[group], tests, source) for group, tests in groups.items()}
+
+    out, matching = [], 0.0
+    for index, path in chunk:
+        began = time.perf_counter()
+        found = {group: monitor.last_test["name"][3:] if monitor.test() else None
+                 for group, monitor in monitors.items()}
+        matching += time.perf_counter() - began
+        out.append((index, found))
+        source.advance()
+    return out, source.unreadable, matching
+
+
+def evaluate(pattern_file, labeled, processes=None, resize_to=None, translation=(0, 0), include_disabled=False):
+    processes = processes or os.cpu_count() or 1
+    chunk_size = max(1, min(32, len(labeled) // (processes * 4)))
+    indexed = [(index, path) for index, (path, label) in enumerate(labeled)]
+    chunks = [indexed[n:n + chunk_size] for n in range(0, len(indexed), chunk_size)]
+
+    found, unreadable, matching = [None] * len(labeled), [], 0.0
+    began = time.perf_counter()
+    initargs = (pattern_file, resize_to, translation, include_disabled)
+    if processes == 1:
+        _initWorker(*initargs)
+        results = list(map(_evaluateChunk, chunks))
+    else:
+        with multiprocessing.Pool(processes, _initWorker, initargs) as pool:    # Terminated on errors and Ctrl-C.
+            results = list(pool.imap_unordered(_evaluateChunk, chunks))
+            pool.close()
+            pool.join()
+    elapsed = time.perf_counter() - began
+    for out, bad, seconds in results:
+        for index, groups_found in out:
+            found[index] = groups_found
+        unreadable += bad
+        matching += seconds
+    return found, unreadable, elapsed, matching
+
+
+def score(groups, labeled, found):     # {pattern name: [tp, fp, fn, frames labeled]}
+    counts = {test["name"]: [0, 0, 0, 0] for tests in groups.values() for test in tests}
+    errors = []
+    for (path, label), groups_found in zip(labeled, found):
+        wrong = False
+        for group, tests in groups.items():
+            prefix = tests[0]["name"][:3] if tests else ""
+            sections = [test["name"][3:] for test in tests]
+            expected = label if label in sections else None
+            got = groups_found[group]
+            if expected is not None:
+                counts[prefix + expected][3] += 1
+            if got == expected:
+                if got is not None: counts[prefix + got][0] += 1
+                continue
+            wrong = True
+            if got is not None: counts[prefix + got][1] += 1
+            if expected is not None: counts[prefix + expected][2] += 1
+        if wrong:
+            errors.append((path, label, groups_found))
+    return counts, errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Measure pattern precision, recall and speed on labeled frames.")
+    parser.add_argument("pattern_file")
+    parser.add_argument("labeled", help="Directory of per-pattern sub-directories, or a CSV of path, pattern rows.")
+    parser.add_argument("--processes", type=int, help="Worker processes. (default: one per CPU)")
+    parser.add_argument("--resolution", help="Scale patterns to this screen size, e.g. 2560,1440.")
+    parser.add_argument("--origin", default="0,0", help="Monitor origin, as in settings.cfg. (default: 0,0)")
+    parser.add_argument("--include-disabled", action="store_true", help="Also test patterns with enabled = False.")
+    parser.add_argument("--errors", action="store_true", help="List every frame that was misclassified.")
+    parser.add_argument("--save", help="Write results to this JSON file.")
+    parser.add_argument("--compare", help="Compare against results saved with --save.")
+    parser.add_argument("--tolerance", type=float, default=.02, help="Drop treated as a regression. (.02)")
+    args = parser.parse_args(argv)
+
+    labeled = readLabeled(args.labeled)
+    if not labeled:
+        parser.error(f"no labeled frames found in {args.labeled}")
+    resize_to = [int(n) for n in args.resolution.split(",")] if args.resolution else None
+    translation = [int(n) for n in args.origin.split(",")]
+    groups, screens = loadPatternFile(args.pattern_file, resize_to, translation)
+    sections = {test["name"][3:] for tests in groups.values() for test in tests}
+    for label in sorted({label for path, label in labeled if label is not None} - sections):
+        print(f"Warning: label '{label}' is not a pattern in {args.pattern_file}")
+    height = max(s["top"] + s["height"] for s in screens.values())
+    width = max(s["left"] + s["width"] for s in screens.values())
+    for path, label in labeled:
+        frame = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if frame is not None:
+            if frame.shape[0] < height or frame.shape[1] < width:
+                parser.error(f"{path} is {frame.shape[1]}x{frame.shape[0]}, the screenshot areas reach "
+                             f"{width}x{height}. Use --resolution and --origin to match the frames.")
+            break
+
+    found, unreadable, elapsed, matching = evaluate(args.pattern_file, labeled, args.processes, resize_to,
+                                                    translation, args.include_disabled)
+    counts, errors = score(groups, labeled, found)
+
+    results = {"frames_per_second": len(labeled) / elapsed, "engine_frames_per_second": len(labeled) / matching}
+    print(f"{'pattern':32s} {'frames':>7s} {'tp':>6s} {'fp':>6s} {'fn':>6s} {'precision':>10s} {'recall':>8s}")
+    for name, (tp, fp, fn, frames) in counts.items():
+        precision = tp / (tp + fp) if tp + fp else None
+        recall = tp / (tp + fn) if tp + fn else None
+        results[f"{name}/precision"], results[f"{name}/recall"] = precision, recall
+        print(f"{name:32s} {frames:7d} {tp:6d} {fp:6d} {fn:6d} "
+              f"{'-' if precision is None else f'{precision:.3f}':>10s} {'-' if recall is None else f'{recall:.3f}':>8s}")
+    results["frame_accuracy"] = 1 - len(errors) / len(labeled)
+    print(f"\n{len(labeled)} frames, {len(errors)} misclassified ({results['frame_accuracy'] * 100:.2f}% correct)")
+    print(f"{results['frames_per_second']:.0f} frames/s overall, "
+          f"{results['engine_frames_per_second']:.0f} frames/s per process in screenTest")
+    for path in unreadable:
+        print(f"Warning: unreadable image {path}")
+
+    if args.errors and errors:
+        print("\n--- Misclassified ---")
+        for path, label, groups_found in errors:
+            got = ", ".join(f"{group}={name}" for group, name in groups_found.items())
+            print(f"{path}  expected {label}  got {got}")
+    if args.save:
+        writeResults(args.save, "evaluation", results)
+    if args.compare:
+        print(f"\n--- Compared to {args.compare} ---")
+        results = {k: v for k, v in results.items() if "frames_per_second" not in k}   # Too noisy to gate on.
+        if compareResults(args.compare, results, args.tolerance, lower_is_better=False):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,184 @@
+import os
+import sys
+import shutil
+import argparse
+from benchSupport import loadPatternFile, timeCall
+from evaluatePatterns import LabeledFrames, readLabeled, score
+import numpy
+from screenMonitoring import getRow, matchPattern
+from extractPattern import sectionText, writeSection
+
+# Shrinks what each pattern asks of matchPattern() without changing what it detects on a labeled frame set (the
+# same layout evaluatePatterns.py reads). Every enabled pattern with labeled frames has its edges and planes
+# removed one at a time, then soften, max and the origin window narrowed, keeping a change only when each
+# pattern's true positives, false positives and misses all stay the same. The scanlines are thresholded once,
+# so a candidate costs one matchPattern() per labeled frame.
+#   python benchmarks/minimizePatterns.py clustertruck.cfg labeled/ --out clustertruck.min.cfg
+# The result is only as discriminative as the labeled set: collect negatives from every screen the game shows.
+
+
+class Minimizer:
+    def __init__(self, groups, screens, labeled):
+        self.groups = groups
+        self.labeled = labeled
+        self.sections = {}      # section name: test dict whose properties are being minimized
+        for tests in groups.values():
+            for test in tests:
+                self.sections.setdefault(test["name"][3:], test)
+        height = max(s["top"] + s["height"] for s in screens.values())
+        width = max(s["left"] + s["width"] for s in screens.values())
+        source = LabeledFrames([path for path, label in labeled], numpy.zeros((height, width), numpy.uint8))
+        self.rows = {(group, test["name"][3:]): [] for group, tests in groups.items() for test in tests}
+        for n in range(len(labeled)):
+            for group, tests in groups.items():
+                shot = source.grab(screens[group])
+                for test in tests:
+                    self.rows[group, test["name"][3:]].append(getRow(shot, test["area"], test["threshold"]))
+            source.advance()
+        self.unreadable = source.unreadable
+        self.matches = {key: self.match(key, self.sections[key[1]]["properties"]) for key in self.rows}
+        self.baseline = self.counts()
+
+    def match(self, key, properties):
+        return numpy.array([matchPattern(row, properties) for row in self.rows[key]], bool)
+
+    def found(self, matches):   # [{group: section or None}] as screenTest picks them: first enabled match wins.
+        out = [{} for n in range(len(self.labeled))]
+        for group, tests in self.groups.items():
+            names = [test["name"][3:] for test in tests if test["enabled"]]
+            if not names:
+                for frame in out: frame[group] = None
+                continue
+            table = numpy.array([matches[group, name] for name in names])
+            first, hit = table.argmax(axis=0), table.any(axis=0)
+            for n, frame in enumerate(out):
+                frame[group] = names[first[n]] if hit[n] else None
+        return out
+
+    def counts(self, matches=None):
+        counts, errors = score(self.groups, self.labeled, self.found(matches or self.matches))
+        return {name: tuple(c[:3]) for name, c in counts.items()}
+
+    def accepts(self, name, properties):   # Match vectors for the candidate, or None if any count would change.
+        matches = dict(self.matches)
+        for key in self.rows:
+            if key[1] == name:
+                matches[key] = self.match(key, properties)
+        return matches if self.counts(matches) == self.baseline else None
+
+    def _try(self, name, properties):
+        matches = self.accepts(name, properties)
+        if matches is None:
+            return False
+        self.matches = matches
+        self.sections[name]["properties"] = properties
+        return True
+
+    def _narrow(self, name, build, current):    # Smallest value in 1..current that is still accepted.
+        low, high = 1, current
+        while low < high:
+            middle = (low + high) // 2
+            if self.accepts(name, build(middle)) is not None:
+                high = middle
+            else:
+                low = middle + 1
+        if high != current:
+            self._try(name, build(high))
+
+    def minimize(self, name, min_edges=1, min_planes=1, passes=3):
+        for n in range(passes):
+            before = repr(self.sections[name]["properties"])
+            for kind in (1, 2):     # Edges, then planes. The file format needs at least one of each.
+                features = self.sections[name]["properties"][kind]
+                for feature in list(features[::-1] if kind == 1 else features[:0:-1]):
+                    origin, edges, solids, limit, soften = self.sections[name]["properties"]
+                    if kind == 1 and len(edges) > max(1, min_edges):
+                        self._try(name, [origin, [e for e in edges if e != feature], solids, limit, soften])
+                    elif kind == 2 and len(solids) - 1 > max(1, min_planes):
+                        self._try(name, [origin, edges, [s for s in solids if s is not feature], limit, soften])
+            origin, edges, solids, limit, soften = self.sections[name]["properties"]
+            self._narrow(name, lambda s: [origin, edges, solids, limit, s], soften)
+            origin, edges, solids, limit, soften = self.sections[name]["properties"]
+            self._narrow(name, lambda m: [origin, edges, solids, m, soften], limit)
+            origin, edges, solids, limit, soften = self.sections[name]["properties"]
+            self._narrow(name, lambda w: [[origin[0], w], edges, solids, limit, soften], origin[1])
+            if repr(self.sections[name]["properties"]) == before:
+                break
+
+    def cost(self, min_time=.05):   # Estimated matchPattern() microseconds per frame for each group.
+        out = {}
+        for group, tests in self.groups.items():
+            reached = numpy.ones(len(self.labeled), bool)
+            total = 0.0
+            for test in tests:
+                if not test["enabled"]:
+                    continue
+                name = test["name"][3:]
+                rows = [row for row, r in zip(self.rows[group, name], reached) if r]
+                if rows:
+                    properties = self.sections[name]["properties"]
+                    each = timeCall(lambda: [matchPattern(row, properties) for row in rows], min_time) / len(rows)
+                    total += each * len(rows) / len(self.labeled)
+                reached &= ~self.matches[group, name]
+            out[group] = total * 1e6
+        return out
+
+
+# ---Functions---
+
+def describe(properties):
+    origin, edges, solids, limit, soften = properties
+    return f"{len(edges):2d}e {len(solids) - 1:2d}p max {limit:3d} origin {origin[0]}:{origin[1]:<3d} soften {soften}"
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Remove pattern features the labeled frames don't need.")
+    parser.add_argument("pattern_file")
+    parser.add_argument("labeled", help="Directory of per-pattern sub-directories, or a CSV of path, pattern rows.")
+    parser.add_argument("--out", help="Minimized pattern file. (default: <pattern_file>.min.cfg)")
+    parser.add_argument("--min-edges", type=int, default=1, help="Edges each pattern keeps. (default: 1)")
+    parser.add_argument("--min-planes", type=int, default=1, help="Planes each pattern keeps. (default: 1)")
+    parser.add_argument("--only", help="Comma-separated sections to minimize. (default: every labeled one)")
+    args = parser.parse_args(argv)
+
+    labeled = readLabeled(args.labeled)
+    if not labeled:
+        parser.error(f"no labeled frames found in {args.labeled}")
+    groups, screens = loadPatternFile(args.pattern_file)
+    minimizer = Minimizer(groups, screens, labeled)
+    for path in minimizer.unreadable:
+        print(f"Warning: unreadable image {path}")
+    original = {name: test["properties"] for name, test in minimizer.sections.items()}
+    before = minimizer.cost()
+
+    shown = {label for path, label in labeled}
+    names = [n.strip() for n in args.only.split(",")] if args.only else list(minimizer.sections)
+    print(f"{'pattern':24s} {'before':40s} {'after'}")
+    changed = []
+    for name in names:
+        if name not in minimizer.sections:
+            parser.error(f"[{name}] is not a pattern in {args.pattern_file}")
+        if not minimizer.sections[name]["enabled"] or name not in shown:
+            print(f"{name:24s} skipped: {'disabled' if name in shown else 'no labeled frames'}")
+            continue
+        minimizer.minimize(name, args.min_edges, args.min_planes)
+        if minimizer.sections[name]["properties"] != original[name]:
+            changed.append(name)
+        print(f"{name:24s} {describe(original[name]):40s} {describe(minimizer.sections[name]['properties'])}")
+
+    after = minimizer.cost()
+    print(f"\n{'group':10s} {'us/frame before':>16s} {'after':>10s}   (matchPattern, measured on the labeled frames)")
+    for group in groups:
+        print(f"{group:10s} {before[group]:16.1f} {after[group]:10.1f}")
+    print(f"{'total':10s} {sum(before.values()):16.1f} {sum(after.values()):10.1f}")
+
+    out = args.out or os.path.splitext(args.pattern_file)[0] + ".min.cfg"
+    shutil.copyfile(args.pattern_file, out)
+    for name in changed:
+        writeSection(out, name, sectionText(name, minimizer.sections[name]))
+    print(f"\nWrote {out}: {len(changed)} patterns minimized, precision and recall unchanged on {len(labeled)} frames.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
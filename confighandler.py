@@ -1,6 +1,17 @@
 import configparser
 import os
+import copy
+import json
+import hashlib
 from random import shuffle
+from frameArchive import FrameArchive
+
+# Compiled pattern files: the ready-to-run screens, tests and roulette clicks for one file content, resolution
+# and origin. Held in memory for the session and as JSON in .patterncache/, found through an index of each file's
+# mtime and size, so a reload that finds nothing changed costs one os.stat().
+CACHE_DIR = ".patterncache"
+CACHE_VERSION = 2   # Bump when the compiled layout changes, so older cache files are passed over.
+_compiled = {}      # (path, mtime_ns, size, resolution, origin) -> compiled pattern file
 
 # ---Functions---
 
@@ -61,6 +72,48 @@ def randomList(total, force_last):
     return out
 
 
+def planRoulette(total, page_clicks, clicks):
+    # Fewest page clicks from every page position to every level, found by a breadth-first search over positions
+    # 0..total-1. plan[position][level] = [[page click indexes], level click index], or None if no clicks reach it.
+    offsets = {click[0]: n for n, click in enumerate(clicks)}
+    plan = []
+    for start in range(total):
+        parent = {start: None}
+        queue = [start]
+        for position in queue:
+            for n, click in enumerate(page_clicks):
+                step = position + click[0]
+                if 0 <= step < total and step not in parent:
+                    parent[step] = (position, n)
+                    queue.append(step)
+        row = [None] * (total + 1)
+        for position in queue:     # Nearest positions first, so the first one to reach a level is the best.
+            for offset, n in offsets.items():
+                level = position + offset
+                if 0 < level <= total and row[level] is None:
+                    pages, step = [], position
+                    while parent[step] is not None:
+                        step, page = parent[step]
+                        pages.append(page)
+                    row[level] = [pages[::-1], n]
+        plan.append(row)
+    return plan
+
+
+def rouletteTimes(plan, page_clicks, delay):
+    # Seconds of clicking to reach each level (index 1..total), averaged over the page positions a run can be on.
+    positions = [0]
+    for position in positions:
+        for click in page_clicks:
+            step = position + click[0]
+            if 0 <= step < len(plan) and step not in positions: positions.append(step)
+    times = [None]
+    for level in range(1, len(plan[0])):
+        routes = [plan[p][level] for p in positions if plan[p][level] is not None]
+        times.append(sum(len(r[0]) + 2 for r in routes) * delay / len(routes) if routes else None)
+    return times
+
+
 def convertResolution(screen_list, detection_list, original_scale, resize_to, translation, click_list=None):
     if resize_to != original_scale or translation != (0, 0):
         sx = resize_to[0] / original_scale[0]
@@ -99,6 +152,113 @@ def scaleClicks(click_list, sx, sy, tx=0, ty=0):
         click_list[click][1][1] = round(click_list[click][1][1] * sy) + ty
 
 
+def compilePatterns(path, resize_to, translation):     # Copy of the compiled pattern file, or None if unreadable.
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None
+    key = (os.path.abspath(path), stat.st_mtime_ns, stat.st_size, tuple(resize_to), tuple(translation))
+    compiled = _compiled.get(key)
+    if compiled is None:
+        compiled = _readCompiled(key)
+        if compiled is None:
+            return None
+        _compiled[key] = compiled
+    compiled = copy.deepcopy(compiled)     # Callers toggle and rescale their patterns; the cached ones stay pristine.
+    compiled["pattern_stamp"] = [stat.st_mtime_ns, stat.st_size]
+    return compiled
+
+
+def _readCompiled(key):
+    path, mtime, size, resize_to, translation = key
+    index_path = resource_path(os.path.join(CACHE_DIR, "index.json"))
+    try:
+        with open(index_path) as f:
+            index = json.load(f)
+    except (OSError, ValueError):
+        index = {}
+    entry = index.get(path)
+    if entry is not None and entry[:2] == [mtime, size]:
+        digest = entry[2]
+    else:
+        try:
+            with open(path, "rb") as f:
+                digest = hashlib.sha1(f.read()).hexdigest()
+        except OSError:
+            return None
+        index[path] = [mtime, size, digest]
+    compiled_path = resource_path(os.path.join(CACHE_DIR, f"{digest}_v{CACHE_VERSION}_{resize_to[0]}x{resize_to[1]}"
+                                                          f"_{translation[0]}_{translation[1]}.json"))
+    try:
+        with open(compiled_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        pass
+
+    compiled = parsePatterns(path, resize_to, translation)
+    if compiled is not None:
+        try:    # The cache is only a shortcut; a read-only folder just means parsing every launch.
+            os.makedirs(resource_path(CACHE_DIR), exist_ok=True)
+            with open(compiled_path, "w") as f:
+                json.dump(compiled, f)
+            with open(index_path, "w") as f:
+                json.dump(index, f)
+        except OSError:
+            pass
+    return compiled
+
+
+def parsePatterns(path, resize_to, translation):
+    pattern_cfg = configparser.ConfigParser(inline_comment_prefixes="#")
+    try:
+        with open(path) as f:
+            pattern_cfg.read_file(f)
+        game_title = pattern_cfg['General Properties']['game_title']
+    except (OSError, KeyError, configparser.Error):
+        return None
+    compiled = {"game_title": game_title}
+    compiled["original_scale"] = [int(n) for n in pattern_cfg['General Properties']['original_scale'].replace(" ", "").split(",")]
+    compiled["auto_click"] = [int(n) for n in pattern_cfg['General Properties']['auto_click'].replace(" ", "").split(",")]
+    compiled["run_screen"] = repackScreen(pattern_cfg['Screenshot Areas']['runtime'])
+    compiled["start_screen"] = repackScreen(pattern_cfg['Screenshot Areas']['prerun'])
+
+    sections = {}   # Sections listed under several groups are parsed once.
+    for group, prefix, attribute in (("runtime", "RT", "run_patterns"), ("prerun", "PR", "prerun_patterns"),
+                                     ("standby", "SB", "standby_patterns")):
+        tests = []
+        for name in pattern_cfg['Tests'][group].split(","):
+            name = name.strip()
+            if name not in sections:
+                sections[name] = patternToDict(name, pattern_cfg)
+            test = copy.deepcopy(sections[name])
+            test["name"] = f"{prefix}:{name}"
+            tests.append(test)
+        compiled[attribute] = tests
+
+    compiled["roulette_clicks"] = None
+    compiled["roulette_plan"] = None
+    try:
+        compiled["roulette"] = bool(pattern_cfg['Roulette']['active'].replace(" ", ""))
+    except KeyError:
+        compiled["roulette"] = False
+    else:
+        compiled["roulette_total"] = int(pattern_cfg['Roulette']['levels'].replace(" ", ""))
+        compiled["roulette_page_clicks"] = sorted(stringToClicks(pattern_cfg['Roulette']['page_clicks']),
+                                                  key=lambda click: click[0])
+        compiled["roulette_clicks"] = sorted(stringToClicks(pattern_cfg['Roulette']['clicks']),
+                                             key=lambda click: click[0])
+        compiled["roulette_backout"] = stringToActions(pattern_cfg['Roulette']['backout'])
+        compiled["roulette_delay"] = float(pattern_cfg['Roulette']['click_delay'].replace(" ", ""))
+        compiled["roulette_final"] = bool(pattern_cfg['Roulette']['last_is_last'].replace(" ", ""))
+        compiled["roulette_plan"] = planRoulette(compiled["roulette_total"], compiled["roulette_page_clicks"],
+                                                 compiled["roulette_clicks"])
+
+    convertResolution([compiled["run_screen"], compiled["start_screen"]],
+                      compiled["run_patterns"] + compiled["prerun_patterns"] + compiled["standby_patterns"],
+                      compiled["original_scale"], list(resize_to), list(translation), compiled["roulette_clicks"])
+    return compiled
+
+
 def repackScreen(screen_str):
     dicto = {}
     arr = screen_str.replace(" ", "").split(",")
@@ -120,14 +280,22 @@ class fileAccess():
     default_livesplit_port = 16834
     default_window_position = "+100+100"
     default_false_pattern_period = .1
+    default_metrics_port = 0
+    default_metrics_profile = False
+    default_refresh_rate = 30
+    default_console_log = True
+    default_watch_patterns = True
 
-    def __init__(self, mainloop):
+    def __init__(self, mainloop, pattern_file=None):
         # ---Main Code---
         if not os.path.exists("falsies"):
             os.makedirs("falsies")
+        self.falsies = FrameArchive(resource_path(os.path.join("falsies", "falsies")))
         self.mainloop = mainloop
         self.loadSettings()
-        self.loadPattern()
+        if pattern_file is not None:
+            self.pattern_file = pattern_file
+        self.pattern_loaded = self.loadPattern()
 
     def saveSettings(self):
         settings_cfg = configparser.RawConfigParser()
@@ -140,11 +308,17 @@ class fileAccess():
         settings_cfg.set("Default Settings", "pause_when_inactive", str(self.pause_when_inactive))
         settings_cfg.set("Default Settings", "pattern_file", self.pattern_file)
         settings_cfg.set("Default Settings", "false_split_period", str(self.false_split_period))
+        settings_cfg.set("Default Settings", "watch_patterns", str(self.watch_patterns))
         settings_cfg.add_section("Livesplit Server")
         settings_cfg.set("Livesplit Server", "host", self.livesplit_host)
         settings_cfg.set("Livesplit Server", "port", str(self.livesplit_port))
         settings_cfg.add_section("GUI Settings")
         settings_cfg.set("GUI Settings", "position", f"{self.window_position.split('+')[1]}, {self.window_position.split('+')[2]}")
+        settings_cfg.set("GUI Settings", "refresh_rate", str(self.refresh_rate))
+        settings_cfg.set("GUI Settings", "console_log", str(self.console_log))
+        settings_cfg.add_section("Metrics")
+        settings_cfg.set("Metrics", "port", str(self.metrics_port))
+        settings_cfg.set("Metrics", "profile", str(self.metrics_profile))
         with open(resource_path("settings.cfg"), 'w') as configfile:
             settings_cfg.write(configfile)
 
@@ -159,6 +333,11 @@ class fileAccess():
         self.livesplit_port = self.default_livesplit_port
         self.window_position = self.default_window_position
         self.false_split_period = self.default_false_pattern_period
+        self.metrics_port = self.default_metrics_port
+        self.metrics_profile = self.default_metrics_profile
+        self.refresh_rate = self.default_refresh_rate
+        self.console_log = self.default_console_log
+        self.watch_patterns = self.default_watch_patterns
         try: self.pattern_file
         except AttributeError: self.pattern_file = self.default_pattern_file
 
@@ -180,10 +359,16 @@ class fileAccess():
             self.pause_when_inactive = settings_cfg.getboolean("Default Settings", "pause_when_inactive")
             self.pattern_file = settings_cfg["Default Settings"]["pattern_file"]
             self.false_split_period = float(settings_cfg["Default Settings"]["false_split_period"])
+            self.watch_patterns = settings_cfg.getboolean("Default Settings", "watch_patterns",
+                                                          fallback=self.default_watch_patterns)
             self.livesplit_host = settings_cfg["Livesplit Server"]["host"]
             self.livesplit_port = settings_cfg.getint("Livesplit Server", "port")
 
             self.window_position = "+" + settings_cfg["GUI Settings"]["position"].replace(", ", "+")
+            self.refresh_rate = settings_cfg.getint("GUI Settings", "refresh_rate", fallback=self.default_refresh_rate)
+            self.console_log = settings_cfg.getboolean("GUI Settings", "console_log", fallback=self.default_console_log)
+            self.metrics_port = settings_cfg.getint("Metrics", "port", fallback=self.default_metrics_port)
+            self.metrics_profile = settings_cfg.getboolean("Metrics", "profile", fallback=self.default_metrics_profile)
 
         print("Settings loaded.")
 
@@ -208,52 +393,24 @@ class fileAccess():
 
     def loadPattern(self):
         print("Reading pattern file.")
-        pattern_cfg = configparser.ConfigParser(inline_comment_prefixes="#")
         if self.pattern_file is not None:
-            try:
-                pattern_cfg.read_file(open(resource_path(self.pattern_file)))
-            except FileNotFoundError or FileExistsError:
+            compiled = compilePatterns(resource_path(self.pattern_file), self.pattern_scale, self.pattern_translation)
+            if compiled is None:
                 self.roulette = False
                 self.roulette_clicks = None
                 return False
-            else:
-                try:
-                    self.game_title = pattern_cfg['General Properties']['game_title']
-                except:
-                    self.roulette = False
-                    self.roulette_clicks = None
-                    return False
-                else:
-                    self.original_scale = [int(n) for n in pattern_cfg['General Properties']['original_scale'].replace(" ", "").split(",")]
-                    self.auto_click = [int(n) for n in pattern_cfg['General Properties']['auto_click'].replace(" ", "").split(",")]
-
-                    self.run_screen = repackScreen(pattern_cfg['Screenshot Areas']['runtime'])
-                    self.start_screen = repackScreen(pattern_cfg['Screenshot Areas']['prerun'])
-                    self.all_screens = [self.run_screen, self.start_screen]
-
-                    self.run_patterns = [patternToDict(n, pattern_cfg, "RT") for n in pattern_cfg['Tests']['runtime'].split(",")]
-                    self.prerun_patterns = [patternToDict(n, pattern_cfg, "PR") for n in pattern_cfg['Tests']['prerun'].split(",")]
-                    self.standby_patterns = [patternToDict(n, pattern_cfg, "SB") for n in pattern_cfg['Tests']['standby'].split(",")]
-                    self.all_patterns = self.run_patterns + self.prerun_patterns + self.standby_patterns
-
-                    try:
-                        self.roulette = bool(pattern_cfg['Roulette']['active'].replace(" ", ""))
-                    except:
-                        self.roulette = False
-                        self.roulette_clicks = None
-                        pass
-                    else:
-                        self.roulette_total = int(pattern_cfg['Roulette']['levels'].replace(" ", ""))
-                        self.roulette_page_clicks = sorted(stringToClicks(pattern_cfg['Roulette']['page_clicks']),
-                                                           key=lambda click: click[0])
-                        self.roulette_clicks = sorted(stringToClicks(pattern_cfg['Roulette']['clicks']),
-                                                      key=lambda click: click[0])
-                        self.roulette_backout = stringToActions(pattern_cfg['Roulette']['backout'])
-                        self.roulette_delay = float(pattern_cfg['Roulette']['click_delay'].replace(" ", ""))
-                        self.roulette_final = bool(pattern_cfg['Roulette']['last_is_last'].replace(" ", ""))
-
-
-                    convertResolution(self.all_screens, self.all_patterns, self.original_scale, self.pattern_scale,
-                                      self.pattern_translation, self.roulette_clicks)
-                    print("Patterns read and stored.")
+            for attribute, value in compiled.items():
+                setattr(self, attribute, value)
+            self.all_screens = [self.run_screen, self.start_screen]
+            self.all_patterns = self.run_patterns + self.prerun_patterns + self.standby_patterns
+            if self.roulette:
+                times = rouletteTimes(self.roulette_plan, self.roulette_page_clicks, self.roulette_delay)
+                missing = [level for level in range(1, len(times)) if times[level] is None]
+                reached = [t for t in times[1:] if t is not None]
+                if reached:
+                    print(f"Roulette navigation: {sum(reached) / len(reached):.2f} s per level on average, "
+                          f"{max(reached):.2f} s at most.")
+                if missing:
+                    print("No roulette clicks reach levels:", ", ".join(str(level) for level in missing))
+            print("Patterns read and stored.")
         return True
@@ -0,0 +1,163 @@
+import os
+import csv
+import sys
+import json
+import time
+import queue
+import atexit
+import struct
+import argparse
+import threading
+
+# Compact binary trace of autosplitter activity: state transitions, pattern detections and LiveSplit commands.
+# Records are packed into an in-memory buffer on the detection thread and written by a background thread.
+#
+# File layout: MAGIC, HEADER (wall-clock ns and perf_counter ns at start), then records of
+#   KIND (uint8), perf_counter ns (uint64), payload.
+# Names are interned: a STRING record defines an id the first time a name appears.
+# Set SPLITRP_TRACE to a file path to trace from startup.
+
+MAGIC = b"SRPT\x01\x00\x00\x00"
+HEADER = struct.Struct("<qq")
+RECORD = struct.Struct("<BQ")
+STRING, STATE, DETECT, COMMAND = 0, 1, 2, 3
+PAYLOADS = {STRING: struct.Struct("<HH"), STATE: struct.Struct("<HH"), DETECT: struct.Struct("<HfQ"),
+            COMMAND: struct.Struct("<H")}
+
+active = None   # The running EventTrace, if any. Hooks test this before recording.
+
+
+class EventTrace:
+    def __init__(self, path, flush_size=1 << 16, flush_interval=1.0):
+        self.path = path
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self._strings = {}
+        self._buffer = bytearray()
+        self._last_flush = time.perf_counter()
+        self._queue = queue.Queue()
+        self._file = open(path, "wb")
+        self._file.write(MAGIC + HEADER.pack(time.time_ns(), time.perf_counter_ns()))
+        self._writer = threading.Thread(target=self._write, name="event-trace", daemon=True)
+        self._writer.start()
+
+    def _id(self, text):
+        string_id = self._strings.get(text)
+        if string_id is None:
+            string_id = self._strings[text] = len(self._strings)
+            raw = str(text).encode("utf-8")
+            self._buffer += RECORD.pack(STRING, time.perf_counter_ns()) + PAYLOADS[STRING].pack(string_id, len(raw))
+            self._buffer += raw
+        return string_id
+
+    def _record(self, kind, payload, stamp=None):
+        now = time.perf_counter_ns()
+        self._buffer += RECORD.pack(kind, now if stamp is None else stamp) + payload
+        if len(self._buffer) >= self.flush_size or now / 1e9 - self._last_flush > self.flush_interval:
+            self.flush()
+
+    def transition(self, old, new):
+        self._record(STATE, PAYLOADS[STATE].pack(self._id(old), self._id(new)))
+
+    def detection(self, name, score=1.0, frame_ns=0):
+        self._record(DETECT, PAYLOADS[DETECT].pack(self._id(name), score, frame_ns))
+
+    def command(self, text):
+        for line in text.split("\r\n"):
+            if line: self._record(COMMAND, PAYLOADS[COMMAND].pack(self._id(line)))
+
+    def flush(self):    # Hands the buffer to the writer thread. Never blocks on disk.
+        self._last_flush = time.perf_counter()
+        if self._buffer:
+            self._queue.put(self._buffer)
+            self._buffer = bytearray()
+
+    def close(self):
+        self.flush()
+        self._queue.put(None)
+        self._writer.join()
+        self._file.close()
+
+    def _write(self):
+        while True:
+            block = self._queue.get()
+            if block is None:
+                return
+            self._file.write(block)
+            self._file.flush()
+
+
+# ---Functions---
+
+def startTrace(path):
+    global active
+    if active is None:
+        active = EventTrace(path)
+        atexit.register(stopTrace)
+    return active
+
+
+def stopTrace():
+    global active
+    if active is not None:
+        active.close()
+        active = None
+
+
+def readTrace(path):    # Yields (wall-clock ns, kind, values...) for every non-string record.
+    with open(path, "rb") as f:
+        data = f.read()
+    if data[:len(MAGIC)] != MAGIC:
+        raise ValueError(f"Not an event trace: {path}")
+    wall_ns, perf_ns = HEADER.unpack_from(data, len(MAGIC))
+    offset = len(MAGIC) + HEADER.size
+    strings = {}
+    while offset + RECORD.size <= len(data):
+        kind, stamp = RECORD.unpack_from(data, offset)
+        payload = PAYLOADS.get(kind)
+        if payload is None or offset + RECORD.size + payload.size > len(data):
+            break   # Unknown record or a write cut short.
+        values = payload.unpack_from(data, offset + RECORD.size)
+        offset += RECORD.size + payload.size
+        when = wall_ns + stamp - perf_ns
+        if kind == STRING:
+            strings[values[0]] = data[offset:offset + values[1]].decode("utf-8", "replace")
+            offset += values[1]
+        elif kind == STATE:
+            yield when, "state", strings[values[0]], strings[values[1]]
+        elif kind == DETECT:
+            yield when, "detect", strings[values[0]], values[1], wall_ns + values[2] - perf_ns if values[2] else 0
+        elif kind == COMMAND:
+            yield when, "command", strings[values[0]]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Convert a splitRP event trace to CSV or JSON.")
+    parser.add_argument("trace")
+    parser.add_argument("--json", action="store_true", help="Write JSON lines instead of CSV.")
+    parser.add_argument("-o", "--output", help="Output file. (default: stdout)")
+    args = parser.parse_args(argv)
+
+    out = open(args.output, "w", newline="") if args.output else sys.stdout
+    fields = {"state": ("from", "to"), "detect": ("pattern", "score", "frame_ns"), "command": ("command",)}
+    writer = csv.writer(out)
+    if not args.json:
+        writer.writerow(["time_ns", "kind", "a", "b", "c"])
+    for record in readTrace(args.trace):
+        if args.json:
+            entry = {"time_ns": record[0], "kind": record[1]}
+            entry.update(zip(fields[record[1]], record[2:]))
+            out.write(json.dumps(entry) + "\n")
+        else:
+            writer.writerow(list(record) + [""] * (5 - len(record)))
+    if out is not sys.stdout:
+        out.close()
+    return 0
+
+
+if os.environ.get("SPLITRP_TRACE") and __name__ != "__main__":
+    startTrace(os.environ["SPLITRP_TRACE"])
+
+
+if __name__ == "__main__":
+    sys.exit(main())
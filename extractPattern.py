@@ -0,0 +1,216 @@
+import os
+import sys
+import argparse
+import configparser
+import cv2
+from confighandler import patternToDict, repackScreen
+from screenMonitoring import getRow, matchPattern, toGray
+from frameArchive import FrameArchive
+
+# Derives a pattern section from captured frames instead of measuring edges and planes by hand. The row is
+# binarized at the pattern's thresh exactly as getRow() does; the first pixel of the opposing shade becomes the
+# origin, every transition after it an edge and every run of the background shade a plane. With several frames of
+# the same screen, soften and max grow just enough to cover how far the features move between them.
+#   python extractPattern.py clustertruck.cfg shot.png --name Credits
+#   python extractPattern.py clustertruck.cfg a.png b.png falsies/falsies.rpa#3 --name "Level Complete 3" \
+#       --screen runtime --row 44 --x 623,0 --thresh 210 --write
+# Frames are full screens at the file's original_scale, or crops of the screenshot area (as falsies are).
+
+SECTION_KEYS = ("enabled", "area", "origin", "max", "edges", "shade", "planes", "soften", "thresh", "action")
+
+
+# ---Functions---
+
+def readFrame(path):    # Grayscale image from a file, or "<archive>.rpa#<index>" for a frame in a FrameArchive.
+    if "#" in path and os.path.splitext(path.rsplit("#", 1)[0])[1] in (".rpa", ".rpi"):
+        base, index = path.rsplit("#", 1)
+        archive = FrameArchive(os.path.splitext(base)[0])
+        try:
+            img = archive.frame(int(index))
+        except (IndexError, ValueError):
+            img = None
+        archive.close()
+    else:
+        img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+    if img is not None and img.ndim == 3:
+        img = toGray(img[:, :, :3])
+    return img
+
+
+def cropScreen(img, screen, original_scale):   # The screenshot area out of a full frame; crops pass through.
+    if img.shape[:2] == (screen["height"], screen["width"]):
+        return img
+    if img.shape[:2] != (original_scale[1], original_scale[0]):
+        return None
+    return img[screen["top"]:screen["top"] + screen["height"], screen["left"]:screen["left"] + screen["width"]]
+
+
+def runsOf(row, min_run=1):     # [[value, start, length]], with runs shorter than min_run folded into the one before.
+    runs = []
+    for x, value in enumerate(row):
+        if runs and runs[-1][0] == value:
+            runs[-1][2] += 1
+        else:
+            runs.append([value, x, 1])
+    merged = []
+    for run in runs:
+        if merged and (run[2] < min_run or merged[-1][0] == run[0]):
+            merged[-1][2] += run[2]
+        else:
+            merged.append(list(run))
+    return merged
+
+
+def rowFeatures(row, shade, limit, min_run=1):   # (start, edges, shade runs) of a thresholded row, or None.
+    start = next((x for x in range(min(limit, len(row))) if row[x] != shade), None)
+    if start is None:
+        return None
+    runs = runsOf([int(v) for v in row[start:]], min_run)
+    edges = [run[1] for run in runs[1:]]
+    planes = [(run[1], run[2]) for run in runs if run[0] == shade]
+    return start, edges, planes
+
+
+def derivePattern(rows, shade=None, min_soften=1, min_run=1, slack=0):
+    # Properties for matchPattern() that every row satisfies, from the first row's features. Also returns the
+    # largest feature shift seen in each row, or None for rows whose features don't line up with the first.
+    shade = int(rows[0][0]) if shade is None else shade
+    features = [rowFeatures(row, shade, len(row), min_run) for row in rows]
+    if features[0] is None:
+        return None, []
+    start, edges, planes = features[0]
+
+    shifts = []
+    for found in features:
+        if found is None or not found[1]:
+            shifts.append(None if edges else 0)
+            continue
+        offsets = [min(abs(e - other) for other in found[1]) for e in edges]
+        shifts.append(max(offsets) if max(offsets) < max(8, min_soften * 2) else None)
+    soften = max([min_soften] + [s + 1 for s in shifts if s is not None])
+    inset = soften - 1
+    planes = [[p + inset, length - 2 * inset] for p, length in planes if length - 2 * inset > 0]
+    limit = max(found[0] for found in features if found is not None) + 1 + slack
+    return [[0, 1], edges, [shade] + planes, limit, soften], shifts
+
+
+def sectionText(name, test):   # A pattern section in the file's own layout, from a test dict.
+    origin, edges, solids, limit, soften = test["properties"]
+    values = {"enabled": str(test["enabled"]), "area": ",".join(str(n) for n in test["area"]),
+              "origin": f"{origin[0]}:{origin[1]}", "max": str(limit), "edges": ",".join(str(e) for e in edges),
+              "shade": str(solids[0]), "planes": ", ".join(f"{p}:{length}" for p, length in solids[1:]),
+              "soften": str(soften), "thresh": str(test["threshold"]),
+              "action": test["action"].replace("\r\n", "\\r\\n")}
+    return f"[{name}]\n" + "".join(f"{key} = {values[key]}\n" for key in SECTION_KEYS)
+
+
+def writeSection(path, name, text):    # Replace the section in place, or append it. Comments elsewhere are kept.
+    with open(path, newline="") as f:
+        content = f.read()
+    newline = "\r\n" if "\r\n" in content else "\n"
+    lines = content.split(newline)
+    start = next((n for n, line in enumerate(lines) if line.strip() == f"[{name}]"), None)
+    if start is None:
+        while lines and not lines[-1].strip():
+            lines.pop()
+        lines += ["", ""] + text.rstrip("\n").split("\n") + [""]
+    else:
+        end = next((n for n in range(start + 1, len(lines)) if lines[n].startswith("[")), len(lines))
+        while end > start + 1 and not lines[end - 1].strip():
+            end -= 1
+        lines[start:end] = text.rstrip("\n").split("\n")
+    with open(path, "w", newline="") as f:
+        f.write(newline.join(lines))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Derive a pattern section from captured frames.")
+    parser.add_argument("pattern_file", help="Pattern .cfg file for the screenshot areas and scale.")
+    parser.add_argument("frames", nargs="+", help="Frames showing the screen, or <archive>.rpa#<index>.")
+    parser.add_argument("--name", required=True, help="Section name. An existing section supplies the defaults.")
+    parser.add_argument("--screen", choices=("runtime", "prerun"), help="Screenshot area the row is in.")
+    parser.add_argument("--row", type=int, help="Row inside the screenshot area.")
+    parser.add_argument("--x", help="Columns to scan, start,end. End before start scans right to left.")
+    parser.add_argument("--thresh", type=int, help="Binarization threshold. (default: the section's, or 127)")
+    parser.add_argument("--shade", type=int, choices=(0, 255), help="Background shade. (default: the row's first pixel)")
+    parser.add_argument("--soften", type=int, default=1, help="Smallest soften to use. (default: 1)")
+    parser.add_argument("--min-run", type=int, default=2, help="Fold runs shorter than this into their neighbor. (2)")
+    parser.add_argument("--slack", type=int, default=0, help="Extra pixels of search window for max.")
+    parser.add_argument("--action", help="Action sent on a match, as written in the file. (default: split\\r\\n)")
+    parser.add_argument("--reject", nargs="*", default=[], help="Frames the pattern must not match.")
+    parser.add_argument("--write", action="store_true", help="Write the section into the pattern file.")
+    args = parser.parse_args(argv)
+
+    cfg = configparser.ConfigParser(inline_comment_prefixes="#")
+    with open(args.pattern_file) as f:
+        cfg.read_file(f)
+    original_scale = [int(n) for n in cfg["General Properties"]["original_scale"].replace(" ", "").split(",")]
+    existing = patternToDict(args.name, cfg) if cfg.has_section(args.name) else None
+    screen = args.screen
+    if screen is None:
+        listed = [g for g in ("runtime", "prerun", "standby") if args.name in
+                  [n.strip() for n in cfg["Tests"][g].split(",")]]
+        if not listed:
+            parser.error(f"[{args.name}] is in no [Tests] list; give --screen")
+        screen = "runtime" if listed[0] == "runtime" else "prerun"
+    if existing is None and (args.row is None or args.x is None):
+        parser.error(f"[{args.name}] is not in {args.pattern_file}; give --row and --x")
+    area = list(existing["area"]) if existing else [0, 0, 0]
+    if args.x is not None:
+        area[0], area[2] = [int(n) for n in args.x.split(",")]
+    if args.row is not None:
+        area[1] = args.row
+    thresh = args.thresh if args.thresh is not None else existing["threshold"] if existing else 127
+    box = repackScreen(cfg["Screenshot Areas"][screen])
+    if area[1] >= box["height"] or max(area[0], area[2]) > box["width"]:
+        parser.error(f"area {area} is outside the {screen} screenshot area ({box['width']}x{box['height']})")
+
+    def rowsOf(paths):
+        rows = []
+        for path in paths:
+            img = readFrame(path)
+            shot = None if img is None else cropScreen(img, box, original_scale)
+            if shot is None:
+                parser.error(f"{path} is unreadable, or neither {original_scale[0]}x{original_scale[1]} "
+                             f"nor the {box['width']}x{box['height']} {screen} screenshot area")
+            rows.append(getRow(shot, area, thresh)[0])
+        return rows
+
+    rows = rowsOf(args.frames)
+    properties, shifts = derivePattern(rows, args.shade, max(1, args.soften), args.min_run, args.slack)
+    if properties is None:
+        print(f"No pixel in the row crosses thresh {thresh}; nothing to match.")
+        return 1
+    test = {"area": area, "properties": properties, "threshold": thresh,
+            "action": args.action.replace("\\r\\n", "\r\n") if args.action else
+            existing["action"] if existing else "split\r\n",
+            "enabled": existing["enabled"] if existing else True}
+
+    failed = 0
+    for path, row, shift in zip(args.frames, rows, shifts):
+        ok = matchPattern(row.reshape(1, -1), properties)
+        failed += not ok
+        print(f"{'matches' if ok else 'NO MATCH':9s} {path}" + ("  (features don't line up)" if shift is None else
+                                                               f"  (shifted {shift} px)" if shift else ""))
+    for path, row in zip(args.reject, rowsOf(args.reject)):
+        ok = matchPattern(row.reshape(1, -1), properties)
+        failed += ok
+        print(f"{'MATCHES' if ok else 'rejected':9s} {path}")
+
+    origin, edges, solids, limit, soften = properties
+    print(f"\n{len(edges)} edges, {len(solids) - 1} planes, max {limit}, soften {soften}" +
+          (f" (section had {len(existing['properties'][1])} edges, {len(existing['properties'][2]) - 1} planes, "
+           f"max {existing['properties'][3]}, soften {existing['properties'][4]})" if existing else ""))
+    text = sectionText(args.name, test)
+    print("\n" + text)
+    if failed:
+        print("Not written: the section must match every frame and reject every --reject frame.")
+        return 1
+    if args.write:
+        writeSection(args.pattern_file, args.name, text)
+        print(f"Wrote [{args.name}] to {args.pattern_file}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,156 @@
+import os
+import sys
+import mmap
+import zlib
+import struct
+import numpy
+import cv2
+
+# Append-only archive of captured frames. Two files share one base path:
+#   <base>.rpa  -- zlib-compressed frame blocks, written back to back.
+#   <base>.rpi  -- fixed-size index records: timestamp, block offset/length, frame shape, pattern name, state.
+# A frame only "exists" once its index record is written, so a crash mid-append leaves a readable archive.
+
+DATA_MAGIC = b"SRPA\x01\x00\x00\x00"
+INDEX_MAGIC = b"SRPI\x01\x00\x00\x00"
+RECORD = struct.Struct("<dQIHHB3x32s16s")   # time, offset, length, height, width, channels, name, state
+
+
+# ---Functions---
+
+def _pack(text, size):
+    return str(text).encode("utf-8")[:size]
+
+
+def _unpack(raw):
+    return raw.rstrip(b"\x00").decode("utf-8", "replace")
+
+
+def convertDirectory(png_dir, archive, remove=False):    # Move a directory of falsies/*.png into an archive.
+    files = []
+    for name in os.listdir(png_dir):
+        stem, ext = os.path.splitext(name)
+        if ext.lower() != ".png":
+            continue
+        try:
+            files.append((float(stem) * 10000, name))   # Falsies are named by last_time / 10000.
+        except ValueError:
+            files.append((os.path.getmtime(os.path.join(png_dir, name)), name))
+    files.sort()
+
+    count = 0
+    for stamp, name in files:
+        path = os.path.join(png_dir, name)
+        img = cv2.imread(path, cv2.IMREAD_UNCHANGED)
+        if img is None:
+            print("Skipped unreadable file:", name)
+            continue
+        archive.append(img, stamp)
+        count += 1
+        if remove:
+            os.remove(path)
+    return count
+
+
+# ---Classes---
+
+class FrameArchive:
+    def __init__(self, base_path, level=6):
+        self.base_path = base_path
+        self.level = level
+        self._data_path = base_path + ".rpa"
+        self._index_path = base_path + ".rpi"
+        self._data_map = None
+        self._index_map = None
+        self._mapped_count = 0
+
+        self._prepare(self._data_path, DATA_MAGIC)
+        self._prepare(self._index_path, INDEX_MAGIC)
+        self._count = (os.path.getsize(self._index_path) - len(INDEX_MAGIC)) // RECORD.size
+        # Drop a partially written trailing index record.
+        with open(self._index_path, "r+b") as f:
+            f.truncate(len(INDEX_MAGIC) + self._count * RECORD.size)
+
+    def __len__(self): return self._count
+
+    def __getitem__(self, i): return self.frame(i)
+
+    def _prepare(self, path, magic):
+        if not os.path.exists(path) or os.path.getsize(path) < len(magic):
+            with open(path, "wb") as f:
+                f.write(magic)
+        else:
+            with open(path, "rb") as f:
+                if f.read(len(magic)) != magic:
+                    raise ValueError(f"Not a frame archive: {path}")
+
+    def append(self, img, timestamp, name="", state=""):
+        img = numpy.ascontiguousarray(img)
+        channels = 1 if img.ndim == 2 else img.shape[2]
+        block = zlib.compress(img.tobytes(), self.level)
+        with open(self._data_path, "ab") as data:
+            offset = data.tell()
+            data.write(block)
+        with open(self._index_path, "ab") as index:
+            index.write(RECORD.pack(timestamp, offset, len(block), img.shape[0], img.shape[1], channels,
+                                    _pack(name, 32), _pack(state, 16)))
+        self._count += 1
+        return self._count - 1
+
+    def _remap(self):
+        self.close()
+        with open(self._data_path, "rb") as f:
+            self._data_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        with open(self._index_path, "rb") as f:
+            self._index_map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._mapped_count = self._count
+
+    def _record(self, i):
+        if i < 0:
+            i += self._count
+        if not 0 <= i < self._count:
+            raise IndexError("frame archive index out of range")
+        if i >= self._mapped_count:
+            self._remap()
+        return RECORD.unpack_from(self._index_map, len(INDEX_MAGIC) + i * RECORD.size)
+
+    def entry(self, i):     # Returns (timestamp, pattern name, state) without touching the frame data.
+        stamp, offset, length, height, width, channels, name, state = self._record(i)
+        return stamp, _unpack(name), _unpack(state)
+
+    def entries(self):
+        for i in range(self._count):
+            yield self.entry(i)
+
+    def frame(self, i):
+        stamp, offset, length, height, width, channels, name, state = self._record(i)
+        raw = zlib.decompress(self._data_map[offset:offset + length])
+        shape = (height, width) if channels == 1 else (height, width, channels)
+        return numpy.frombuffer(raw, numpy.uint8).reshape(shape)
+
+    def close(self):
+        if self._data_map is not None:
+            self._data_map.close()
+            self._index_map.close()
+        self._data_map, self._index_map = None, None
+        self._mapped_count = 0
+
+
+if __name__ == "__main__":
+    usage = "Usage: frameArchive.py convert <png_dir> <archive> [--remove]\n" \
+            "       frameArchive.py list <archive>\n" \
+            "       frameArchive.py export <archive> <index> <out.png>"
+    if len(sys.argv) < 3:
+        print(usage)
+        sys.exit(1)
+    if sys.argv[1] == "convert" and len(sys.argv) >= 4:
+        total = convertDirectory(sys.argv[2], FrameArchive(sys.argv[3]), "--remove" in sys.argv)
+        print(f"Archived {total} frames.")
+    elif sys.argv[1] == "list":
+        for n, (stamp, name, state) in enumerate(FrameArchive(sys.argv[2]).entries()):
+            print(f"{n:6d}  {stamp:.4f}  {state:8s}  {name}")
+    elif sys.argv[1] == "export" and len(sys.argv) >= 5:
+        cv2.imwrite(sys.argv[4], FrameArchive(sys.argv[2]).frame(int(sys.argv[3])))
+    else:
+        print(usage)
+        sys.exit(1)
@@ -1,6 +1,9 @@
+import atexit
 import tkinter as tk
+import weakref
 from time import time as time
 from warnings import warn
+import numpy
 
 
 def limitMove(start, size, low_bound, high_bound):
@@ -29,35 +32,122 @@ def updateHover(widget):
         widget.disable()
     
 
+# Process-wide image cache: each image file is decoded once and shared by every skin and background.
+_image_cache = {}   # path -> [PhotoImage, references]
+
+
+def loadImage(path):
+    entry = _image_cache.get(path)
+    if entry is None:
+        entry = _image_cache[path] = [tk.PhotoImage(file=path), 0]
+    entry[1] += 1
+    return entry[0]
+
+
+def releaseImage(path):
+    entry = _image_cache.get(path)
+    if entry is not None:
+        entry[1] -= 1
+        if entry[1] < 1:
+            del _image_cache[path]
+
+
 def drawBar(trough_image, cap_image, width, height, horizontal=False):
-    newimg = tk.PhotoImage(width=width, height=height)
+    # Composites a bar from a tiled trough and two end caps on an array, then makes one PhotoImage of it.
+    canvas = numpy.zeros((max(height, 0), max(width, 0), 3), numpy.uint8)
     cap_w, cap_h = cap_image.width(), cap_image.height()
 
     if horizontal or width > height:
-        putToImage(cap_image, newimg, (0, 0, cap_h, cap_w), rotate=True)
-        putToImage(trough_image, newimg, (cap_h, 0, width-cap_h, height), rotate=True)
-        putToImage(cap_image, newimg, (width-cap_h, 0, width, height), mirror_x=True, rotate=True)
+        putToImage(cap_image, canvas, (0, 0, cap_h, cap_w), rotate=True)
+        putToImage(trough_image, canvas, (cap_h, 0, width-cap_h, height), rotate=True)
+        putToImage(cap_image, canvas, (width-cap_h, 0, width, height), mirror_x=True, rotate=True)
     else:
         cap_h = cap_image.height()
-        putToImage(cap_image, newimg, (0, 0, cap_w, cap_h))
-        putToImage(trough_image, newimg, (0, cap_h, width, height-cap_h))
-        putToImage(cap_image, newimg, (0, height-cap_h, width, height), mirror_y=True)
-    return newimg
+        putToImage(cap_image, canvas, (0, 0, cap_w, cap_h))
+        putToImage(trough_image, canvas, (0, cap_h, width, height-cap_h))
+        putToImage(cap_image, canvas, (0, height-cap_h, width, height), mirror_y=True)
+    return arrayToImage(canvas)
 
 
 def putToImage(brush, canvas, bbox, mirror_x=False, mirror_y=False, rotate=False):
-    value1 = brush.height() if rotate else brush.width()
-    value2 = brush.width() if rotate else brush.height()
-    start1, end1, increment1 = (value1-1, -1, -1) if mirror_x else (0, value1, 1)
-    start2, end2, increment2 = (value2-1, -1, -1) if mirror_y else (0, value2, 1)
-
-    data = ""
-    for col in range(start2, end2, increment2):
-        data = data + "{"
-        for row in range(start1, end1, increment1):
-            data = data + "#%02x%02x%02x " % brush.get(col if rotate else row, row if rotate else col)
-        data = data + "} "
-    canvas.put(data, to=bbox)
+    # Tiles brush (a PhotoImage or RGB array) over bbox of the canvas array, as PhotoImage.put(to=bbox) would.
+    block = brush if isinstance(brush, numpy.ndarray) else imageArray(brush)
+    if rotate: block = block.transpose(1, 0, 2)
+    if mirror_x: block = block[:, ::-1]
+    if mirror_y: block = block[::-1]
+    region = canvas[max(bbox[1], 0):bbox[3], max(bbox[0], 0):bbox[2]]
+    if region.size and block.size:
+        reps = (-(-region.shape[0] // block.shape[0]), -(-region.shape[1] // block.shape[1]), 1)
+        region[:] = numpy.tile(block, reps)[:region.shape[0], :region.shape[1]]
+
+
+_pixel_cache = weakref.WeakKeyDictionary()     # PhotoImage -> its pixels, read from Tk once.
+
+
+def imageArray(image):     # A PhotoImage's pixels as a (height, width, 3) RGB array.
+    pixels = _pixel_cache.get(image)
+    if pixels is None:
+        data = image.tk.call(image, "data")     # One call: rows of "#rrggbb" colors.
+        text = data if isinstance(data, str) else " ".join(_flatten(data))
+        text = text.replace("#", "").replace("{", " ").replace("}", " ")
+        pixels = numpy.frombuffer(bytes.fromhex(text), numpy.uint8).reshape(image.height(), image.width(), 3)
+        _pixel_cache[image] = pixels
+    return pixels
+
+
+def arrayToImage(pixels):   # One bulk transfer of an RGB array into a new PhotoImage, as binary PPM.
+    height, width = pixels.shape[:2]
+    if not width or not height:
+        return tk.PhotoImage(width=width, height=height)
+    header = f"P6 {width} {height} 255\n".encode()
+    return tk.PhotoImage(width=width, height=height, format="PPM",
+                         data=header + numpy.ascontiguousarray(pixels, numpy.uint8).tobytes())
+
+
+def _flatten(data):
+    for item in data:
+        if isinstance(item, str):
+            yield item
+        else:
+            yield from _flatten(item)
+
+
+class Refresher:
+    # Collects the state widgets should show and pushes it to Tk at most `rate` times a second. Options are only
+    # configured when they differ from what is displayed, and console lines are written in one batch per refresh.
+    def __init__(self, rate=30, console=True):
+        self.interval = 1 / rate if rate else 0.0
+        self.console = console
+        self._desired = {}      # (widget, option) -> value
+        self._shown = {}
+        self._lines = []
+        self._next = 0.0
+        atexit.register(self.flushLog)     # The last status lines are queued just before the loop exits.
+
+    def set(self, widget, **options):
+        for option, value in options.items():
+            self._desired[widget, option] = value
+
+    def log(self, text):
+        if self.console: self._lines.append(str(text))
+
+    def flush(self, force=False):
+        now = time()
+        if not force and now < self._next:
+            return False
+        self._next = now + self.interval
+        for (widget, option), value in self._desired.items():
+            if self._shown.get((widget, option), self) != value:
+                widget.configure({option: value})
+                self._shown[widget, option] = value
+        self._desired.clear()
+        self.flushLog()
+        return True
+
+    def flushLog(self):
+        if self._lines:
+            print("\n".join(self._lines), flush=True)
+            self._lines.clear()
 
 
 class Windowable(tk.Tk):
@@ -99,7 +189,7 @@ class Windowable(tk.Tk):
     def bindChild(self, ChildableWindow): self.child_list.append(ChildableWindow)
 
     def loadTabImage(self, image_path):
-        img = tk.PhotoImage(file=image_path)
+        img = loadImage(image_path)
         img_w, img_h = img.width(), img.height()
         self._mid_width = int((img_w - self.winfo_width()) / 2)
         self._mid_height = int((img_h - self.winfo_height()) / 2)
@@ -206,6 +296,7 @@ class Backgroundable(tk.Frame):
         super().__init__(parent, width=width, height=height)
         self.pack_propagate(tk.FALSE)
         self.inner = Canvasable(self, **kwargs)
+        self._img_path = None
 
         if image_path is not None:
             self.setImage(image_path)
@@ -213,23 +304,36 @@ class Backgroundable(tk.Frame):
 
     def setImage(self, image_path):
         try:
-            self.directSetImage(tk.PhotoImage(file=image_path))
+            image = loadImage(image_path)
         except tk.TclError:
             warn(f"guiABLE: Image not found: {image_path}", RuntimeWarning)
+        else:
+            self.directSetImage(image)
+            self._img_path = image_path
 
     def directSetImage(self, image):
+        if self._img_path is not None:
+            releaseImage(self._img_path)
+            self._img_path = None
         self.inner.configure(state=tk.NORMAL)
         self.inner.delete(1.0, tk.END)
         self._img = image
         self.inner.image_create(tk.END, image=self._img)
         self.inner.configure(state=tk.DISABLED)
 
+    def destroy(self):
+        if self._img_path is not None:
+            releaseImage(self._img_path)
+            self._img_path = None
+        super().destroy()
+
 
 class Skinnable():
     def __init__(self, normal_path=None, hover_path=None, active_path=None, disabled_path=None):
         self._recipients = []
         self._paths = [normal_path, hover_path, active_path, disabled_path]
         self._images = [None, None, None, None]
+        self._cached = [None, None, None, None]     # Cache path behind each image this skin loaded.
 
         self.changePaths(normal_path, hover_path, active_path, disabled_path)
 
@@ -254,12 +358,12 @@ class Skinnable():
         paths = [normal_path, hover_path, active_path, disabled_path]
         for n in range(4):
             if paths[n] is not None:
-                if not self._checkDuplicates(paths[n], n):
-                    self._paths[n] = paths[n]
-                    if _direct:
-                        self._images[n] = paths[n]
-                    else:
-                        self._loadImg(paths[n], n)
+                self._paths[n] = paths[n]
+                if _direct:
+                    self._releaseImg(n)
+                    self._images[n] = paths[n]
+                else:
+                    self._loadImg(paths[n], n)
 
     def directSetImages(self, normal_img=None, hover_img=None, active_img=None, disabled_img=None):
         self.changePaths(normal_img, hover_img, active_img, disabled_img, True)
@@ -275,20 +379,21 @@ class Skinnable():
 
     def images(self): return self._images
 
-    def _checkDuplicates(self, reference, index):
-        for i in range(4):
-            if self._images[i] is not None and self._paths[i] == reference:
-                self._paths[index] = reference
-                self._images[index] = self._images[i]
-                return True
-        return False
-
     def _loadImg(self, img_path, index):
         if img_path is not None:
             try:
-                self._images[index] = tk.PhotoImage(file=img_path)
+                image = loadImage(img_path)
             except tk.TclError:
                 warn(f"guiABLE: Image not found: {img_path}", RuntimeWarning)
+            else:
+                self._releaseImg(index)
+                self._images[index] = image
+                self._cached[index] = img_path
+
+    def _releaseImg(self, index):
+        if self._cached[index] is not None:
+            releaseImage(self._cached[index])
+            self._cached[index] = None
 
 
 class Imageable(tk.Canvas):
@@ -814,6 +919,8 @@ class ScrollablePane(ScrollableCanvas):
 
 
 class BarSkin(Skinnable):
+    cache_size = 16
+
     def __init__(self, mids_skinnable=None, ends_skinnable=None, width=20, height=20, horizontal=False):
         super().__init__()
         if mids_skinnable is None:
@@ -823,13 +930,24 @@ class BarSkin(Skinnable):
         self.changeSkins(mids_skinnable, ends_skinnable)
 
     def drawBars(self, width, height, horizontal=False):
-        images = []
-        for n in range(4):
-            images.append(drawBar(self.mids.images()[n], self.ends.images()[n], width, height, horizontal))
+        key = (width, height, horizontal)
+        images = self._drawn.pop(key, None)
+        if images is None:
+            drawn = {}      # States often share images; composite each mid/end pair once.
+            images = []
+            for n in range(4):
+                mid, end = self.mids.images()[n], self.ends.images()[n]
+                if (mid, end) not in drawn:
+                    drawn[mid, end] = drawBar(mid, end, width, height, horizontal)
+                images.append(drawn[mid, end])
+            if len(self._drawn) >= self.cache_size:
+                del self._drawn[next(iter(self._drawn))]    # Drop the least recently drawn size.
+        self._drawn[key] = images
         self.directSetImages(images[0], images[1], images[2], images[3])
 
     def changeSkins(self, mids_skinnable, ends_skinnable):
         self.mids, self.ends = mids_skinnable, ends_skinnable
+        self._drawn = {}    # (width, height, horizontal) -> composited images, most recent last.
 
 
 class ScrollableSkin:
@@ -0,0 +1,113 @@
+import sys
+import time
+import argparse
+from confighandler import fileAccess
+from screenMonitoring import openSource, enableProfiling
+from splitterCore import LivesplitClient, autoSplitter
+from eventTrace import startTrace
+
+# Runs the autosplitter without a window. Status, detections and run-state colors are printed (or logged)
+# instead of drawn, so the engine can be driven by recorded frames on machines with no display or win32.
+
+
+class HeadlessView:
+    colors = ["running", "ready", "standby", "inactive"]
+
+    def __init__(self, log=None, quiet=False, fps_interval=5.0):
+        self.closing = False
+        self.log = log
+        self.quiet = quiet
+        self.fps_interval = fps_interval
+        self._next_fps = time.time() + fps_interval
+        self._began = time.time()
+
+    def _write(self, kind, text):
+        line = f"{time.time() - self._began:10.3f}  {kind:8s}  {text}"
+        if not self.quiet:
+            print(line)
+        if self.log is not None:
+            self.log.write(line + "\n")
+
+    def updateStatus(self, txt): self._write("status", txt)
+
+    def highlight_pattern(self, pattern=None):
+        if pattern is not None: self._write("detect", pattern)
+
+    def load_patterns(self, patterns=None):
+        if patterns is not None: self._write("patterns", ", ".join(p["name"] for p in patterns))
+
+    def colorLED(self, color): self._write("state", self.colors[color])
+
+    def updateFPS(self, loop_timer):
+        if self.fps_interval and time.time() > self._next_fps:
+            self._next_fps = time.time() + self.fps_interval
+            t = loop_timer
+            self._write("loop", f"{t.fps:.1f} fps  p50 {t.p50 * 1e3:.2f}  p95 {t.p95 * 1e3:.2f}  "
+                                f"p99 {t.p99 * 1e3:.2f}  max {t.max * 1e3:.2f} ms  spikes {t.spikes}")
+
+    def showLivesplitLost(self): pass
+
+    def showLivesplitFound(self): pass
+
+    def showInactive(self): self._write("state", self.colors[3])
+
+    def showActive(self): pass
+
+    def signalDetection(self, state_changed=False): pass
+
+    def signalCommand(self): pass
+
+    def storePosition(self): pass
+
+    def update(self): pass
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run the splitRP autosplitter without a GUI.")
+    parser.add_argument("pattern_file", help="Pattern .cfg file to load.")
+    parser.add_argument("--source", default="screen",
+                        help="'screen' (default), a video file, a directory of frames, or a frame archive (.rpa).")
+    parser.add_argument("--realtime", action="store_true", help="Play recorded sources at their recorded rate.")
+    parser.add_argument("--rate", type=float, default=60.0, help="Frame rate of image sources. (default: 60)")
+    parser.add_argument("--host", help="LiveSplit Server host. (default: from settings.cfg)")
+    parser.add_argument("--port", type=int, help="LiveSplit Server port. (default: from settings.cfg)")
+    parser.add_argument("--lock-to-window", action="store_true",
+                        help="Pause detection when the game window loses focus. (Windows only)")
+    parser.add_argument("--log", help="Append events to this file.")
+    parser.add_argument("--profile", nargs="?", const="1", metavar="PATH",
+                        help="Time each capture stage and test; print at exit, or append to PATH.")
+    parser.add_argument("--trace", metavar="PATH", help="Record a binary event trace. (see eventTrace.py)")
+    parser.add_argument("--metrics", type=int, metavar="PORT",
+                        help="Serve Prometheus metrics on http://127.0.0.1:PORT/metrics.")
+    parser.add_argument("--quiet", action="store_true", help="Don't print events to the console.")
+    args = parser.parse_args(argv)
+
+    if args.profile: enableProfiling(args.profile)
+    if args.trace: startTrace(args.trace)
+    log = open(args.log, "a") if args.log else None
+    view = HeadlessView(log, args.quiet)
+    livesplit = LivesplitClient()
+    speedrun = autoSplitter(livesplit, openSource(args.source, args.realtime, args.rate))
+    speedrun.save_on_exit = False
+    file = fileAccess(speedrun, args.pattern_file)
+    if not file.pattern_loaded:
+        print(f"Unable to load pattern file: {args.pattern_file}")
+        return 1
+    if args.metrics or file.metrics_port:
+        from metricsServer import MetricsServer
+        MetricsServer(speedrun, args.metrics or file.metrics_port, file.metrics_profile)
+    file.lock_to_window = args.lock_to_window
+    if args.host: file.livesplit_host = args.host
+    if args.port: file.livesplit_port = args.port
+
+    try:
+        speedrun.mainloop(file, view)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        if log is not None: log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
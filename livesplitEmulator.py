@@ -0,0 +1,245 @@
+import sys
+import time
+import socket
+import argparse
+import threading
+import socketserver
+from timing import secsToHMS, HMStoSecs
+
+# A stand-in for LiveSplit Server. Speaks the same newline-delimited text protocol on port 16834, keeps a
+# timer with LiveSplit's phases, and records every command with its receive time. Latency and dropped
+# connections can be injected to exercise LivesplitClient's reconnect handling.
+
+
+class SplitTimer:
+    def __init__(self, segments=0):
+        self.segments = segments    # Splits until the run ends. 0 = never ends.
+        self.reset()
+
+    def reset(self):
+        self.phase = "NotRunning"
+        self.splits = []            # (real time, game time) per split.
+        self._real = 0.0
+        self._real_since = None
+        self._game = 0.0
+        self._game_since = None
+        self._game_paused = False
+        self._game_initialized = False
+
+    def realTime(self, now):
+        return self._real + (now - self._real_since if self._real_since is not None else 0.0)
+
+    def gameTime(self, now):
+        return self._game + (now - self._game_since if self._game_since is not None else 0.0)
+
+    def _freeze(self, now):
+        self._real, self._real_since = self.realTime(now), None
+        self._game, self._game_since = self.gameTime(now), None
+
+    def _thaw(self, now):
+        self._real_since = now
+        if not self._game_paused: self._game_since = now
+
+    def start(self, now):
+        if self.phase == "NotRunning":
+            self.reset()
+            self.phase = "Running"
+            self._thaw(now)
+
+    def split(self, now):
+        if self.phase == "Running":
+            self.splits.append((self.realTime(now), self.gameTime(now)))
+            if self.segments and len(self.splits) >= self.segments:
+                self._freeze(now)
+                self.phase = "Ended"
+
+    def unsplit(self, now):
+        if self.splits and self.phase in ("Running", "Paused", "Ended"):
+            self.splits.pop()
+            if self.phase == "Ended":
+                self.phase = "Running"
+                self._thaw(now)
+
+    def command(self, line, now):   # Apply one protocol line. Returns the response text, or None.
+        parts = line.strip().split(" ", 1)
+        cmd, arg = parts[0].lower(), parts[1] if len(parts) > 1 else ""
+
+        if cmd == "starttimer": self.start(now)
+        elif cmd == "startorsplit": self.split(now) if self.phase == "Running" else self.start(now)
+        elif cmd == "split": self.split(now)
+        elif cmd == "unsplit": self.unsplit(now)
+        elif cmd == "skipsplit":
+            if self.phase == "Running": self.splits.append((None, None))
+        elif cmd == "reset": self.reset()
+        elif cmd == "pause":
+            if self.phase == "Running":
+                self._freeze(now)
+                self.phase = "Paused"
+        elif cmd == "resume":
+            if self.phase == "Paused":
+                self.phase = "Running"
+                self._thaw(now)
+        elif cmd == "initgametime": self._game_initialized = True
+        elif cmd in ("setgametime", "setloadingtimes"):
+            try:
+                value = HMStoSecs(arg)
+            except ValueError:
+                return None
+            if cmd == "setgametime":
+                self._game = value
+                if self._game_since is not None: self._game_since = now
+            else:
+                self._game = self.realTime(now) - value
+                if self._game_since is not None: self._game_since = now
+        elif cmd == "pausegametime":
+            self._game, self._game_since = self.gameTime(now), None
+            self._game_paused = True
+        elif cmd == "unpausegametime":
+            self._game_paused = False
+            if self.phase == "Running" and self._game_since is None: self._game_since = now
+        elif cmd == "getcurrenttimerphase": return self.phase
+        elif cmd == "getsplitindex": return str(len(self.splits) if self.phase != "NotRunning" else -1)
+        elif cmd in ("getcurrenttime", "getcurrentrealtime"): return secsToHMS(self.realTime(now))
+        elif cmd == "getcurrentgametime": return secsToHMS(self.gameTime(now))
+        elif cmd == "getlastsplittime":
+            return secsToHMS(self.splits[-1][0]) if self.splits and self.splits[-1][0] is not None else "-"
+        elif cmd == "getfinaltime":
+            return secsToHMS(self.splits[-1][0]) if self.phase == "Ended" else "-"
+        elif cmd == "ping": return "pong"
+        return None
+
+
+class _ClientHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        emulator = self.server.emulator
+        emulator._addClient(self.request)
+        try:
+            while True:
+                line = self.rfile.readline()
+                if not line:
+                    break
+                if not emulator._handle(self.request, line.decode("utf-8", "replace")):
+                    break
+        except (ConnectionError, OSError):
+            pass
+        finally:
+            emulator._removeClient(self.request)
+
+
+class _Server(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+
+class LivesplitEmulator:
+    def __init__(self, host="localhost", port=16834, segments=0, latency=0.0, drop_after=None, log=None):
+        self.timer = SplitTimer(segments)
+        self.latency = latency          # Seconds to hold each command before applying and answering it.
+        self.drop_after = drop_after    # Close a connection after this many commands from it.
+        self.refuse = False             # When True, new connections are closed immediately.
+        self.log = log
+        self.commands = []              # (receive time_ns, receive perf_counter_ns, client, command, response)
+        self.connections = 0
+        self._clients = {}
+        self._lock = threading.Lock()
+        self._server = _Server((host, port), _ClientHandler, bind_and_activate=True)
+        self._server.emulator = self
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = None
+
+    def start(self):
+        self._thread = threading.Thread(target=self._server.serve_forever, name="livesplit-emulator", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self._server.shutdown()
+        self.dropClients()
+        self._server.server_close()
+
+    def __enter__(self): return self.start()
+
+    def __exit__(self, *exc): self.stop()
+
+    def dropClients(self):      # Simulate LiveSplit going away mid-run.
+        with self._lock:
+            clients = list(self._clients)
+        for client in clients:
+            try:
+                client.shutdown(socket.SHUT_RDWR)
+            except OSError:
+                pass
+            client.close()
+
+    def received(self, command=None):   # Commands received so far, optionally only those named `command`.
+        with self._lock:
+            if command is None:
+                return list(self.commands)
+            return [c for c in self.commands if c[3].split(" ", 1)[0] == command]
+
+    def _addClient(self, client):
+        with self._lock:
+            self.connections += 1
+            self._clients[client] = 0
+            refuse = self.refuse
+        if refuse:
+            client.close()
+
+    def _removeClient(self, client):
+        with self._lock:
+            self._clients.pop(client, None)
+
+    def _handle(self, client, line):
+        wall_ns, perf_ns = time.time_ns(), time.perf_counter_ns()
+        command = line.strip()
+        if not command:
+            return True
+        if self.latency:
+            time.sleep(self.latency)
+        with self._lock:
+            response = self.timer.command(command, perf_ns / 1e9)
+            self.commands.append((wall_ns, perf_ns, id(client), command, response))
+            self._clients[client] = self._clients.get(client, 0) + 1
+            count = self._clients[client]
+            if self.log is not None:
+                self.log.write(f"{wall_ns},{perf_ns},{id(client)},{command},{response or ''}\n")
+                self.log.flush()
+        if response is not None:
+            client.sendall((response + "\r\n").encode())
+        if self.drop_after is not None and count >= self.drop_after:
+            return False
+        return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Stand-in LiveSplit Server for testing splitRP.")
+    parser.add_argument("--host", default="localhost")
+    parser.add_argument("--port", type=int, default=16834)
+    parser.add_argument("--segments", type=int, default=0, help="Splits until the run ends. (default: never)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds of delay added to every command.")
+    parser.add_argument("--drop-after", type=int, help="Drop each connection after this many commands.")
+    parser.add_argument("--log", help="Write received commands as CSV to this file.")
+    args = parser.parse_args(argv)
+
+    log = open(args.log, "a") if args.log else None
+    emulator = LivesplitEmulator(args.host, args.port, args.segments, args.latency, args.drop_after, log)
+    print(f"LiveSplit emulator listening on {emulator.host}:{emulator.port}")
+    emulator.start()
+    try:
+        last = 0
+        while True:
+            time.sleep(.1)
+            commands = emulator.received()
+            for wall_ns, perf_ns, client, command, response in commands[last:]:
+                print(f"{wall_ns / 1e9:.6f}  [{client:x}]  {command}" + (f"  -> {response}" if response else ""))
+            last = len(commands)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        emulator.stop()
+        if log is not None: log.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,94 @@
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import screenMonitoring
+
+# Serves detection health as Prometheus text on http://127.0.0.1:<port>/metrics.
+# The detection loop only writes plain attributes and histogram counters; this thread reads them as they are,
+# without locks. A scrape may see one counter a frame ahead of another, which is fine for monitoring.
+# Capture-stage and per-test timings need the stage profiler, which times every pattern test. It is turned on by
+# profile = True under [Metrics] in settings.cfg, SPLITRP_PROFILE or headless --profile.
+# Loop time quantiles cover the LoopTimer's rolling window, so they are gauges rather than a summary.
+
+
+def _line(out, name, value, labels=None, help_text=None, kind="gauge"):
+    if help_text is not None:
+        out.append(f"# HELP {name} {help_text}")
+        out.append(f"# TYPE {name} {kind}")
+    label = "" if not labels else "{" + ",".join(f'{k}="{_escape(v)}"' for k, v in labels.items()) + "}"
+    out.append(f"{name}{label} {value:.9g}" if isinstance(value, float) else f"{name}{label} {value}")
+
+
+def _escape(text): return str(text).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+def renderMetrics(speedrun):
+    out = []
+    timer = speedrun.loop_timer
+    _line(out, "splitrp_loop_fps", timer.fps, help_text="Detection loop iterations per second.")
+    _line(out, "splitrp_loop_seconds", timer.p50, {"quantile": "0.5"}, "Detection loop time over the last frames.")
+    _line(out, "splitrp_loop_seconds", timer.p95, {"quantile": "0.95"})
+    _line(out, "splitrp_loop_seconds", timer.p99, {"quantile": "0.99"})
+    _line(out, "splitrp_loop_seconds", timer.max, {"quantile": "1"})
+    _line(out, "splitrp_loop_spikes_total", timer.spikes, help_text="Loop gaps over 3x the median.", kind="counter")
+
+    state = speedrun._state
+    _line(out, "splitrp_state", 1, {"state": state}, "Current autosplitter state.")
+    _line(out, "splitrp_false_splits_total", speedrun.false_splits,
+          help_text="Splits undone by the false-split check.", kind="counter")
+
+    livesplit = speedrun.livesplit
+    _line(out, "splitrp_livesplit_connected", int(bool(livesplit.connected)), help_text="LiveSplit connection up.")
+    _line(out, "splitrp_livesplit_reconnects_total", livesplit.reconnects,
+          help_text="LiveSplit connections made after the first.", kind="counter")
+    _line(out, "splitrp_livesplit_commands_total", livesplit.commands, help_text="Commands sent.", kind="counter")
+    _line(out, "splitrp_livesplit_rtt_seconds", livesplit.last_rtt,
+          help_text="Round trip of the last LiveSplit query.")
+
+    profiler = screenMonitoring.profiler
+    if profiler is not None:
+        first = True
+        for name, h in list(profiler.stages.items()):
+            _line(out, "splitrp_stage_seconds_mean", h.mean() / 1e9, {"stage": name},
+                  "Mean time per capture stage." if first else None)
+            first = False
+        first = True
+        for name, h in list(profiler.tests.items()):
+            _line(out, "splitrp_test_seconds_mean", h.mean() / 1e9, {"test": name},
+                  "Mean cost of one pattern test." if first else None)
+            first = False
+        first = True
+        for name, h in list(profiler.tests.items()):
+            _line(out, "splitrp_test_runs_total", h.count, {"test": name},
+                  "Pattern tests run." if first else None, "counter")
+            first = False
+    return "\n".join(out) + "\n"
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] not in ("/", "/metrics"):
+            self.send_error(404)
+            return
+        body = renderMetrics(self.server.speedrun).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "text/plain; version=0.0.4; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args): pass
+
+
+class MetricsServer:
+    def __init__(self, speedrun, port=9184, profile=False, host="127.0.0.1"):
+        if profile: screenMonitoring.enableProfiling()     # Before the splitter builds its screenTests.
+        self._server = ThreadingHTTPServer((host, port), _MetricsHandler)
+        self._server.daemon_threads = True
+        self._server.speedrun = speedrun
+        self.host, self.port = self._server.server_address[:2]
+        self._thread = threading.Thread(target=self._server.serve_forever, name="metrics", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._server.shutdown()
+        self._server.server_close()
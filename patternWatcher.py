@@ -0,0 +1,112 @@
+import os
+import copy
+import threading
+import configparser
+from collections import deque
+from confighandler import resource_path, patternToDict, convertResolution
+
+# Hot reload for pattern files. A background thread stats the loaded file; when it changes, the thread compares
+# each section with the version that was loaded and compiles only the pattern sections that differ. The detection
+# loop picks the result up between frames with apply(), which rewrites the live test dicts in place, so the running
+# screenTests, the run state and the LiveSplit connection carry on. Changes to screens, test lists or roulette
+# settings fall back to a full reload of the file, still without resetting the run.
+
+STRUCTURE = ("General Properties", "Screenshot Areas", "Tests", "Roulette")
+
+
+def readSections(path):     # ({section: {key: raw value}}, parser), or None if the file can't be parsed.
+    cfg = configparser.ConfigParser(inline_comment_prefixes="#")
+    try:
+        with open(path) as f:
+            cfg.read_file(f)
+    except (OSError, configparser.Error):
+        return None
+    return {name: dict(cfg[name]) for name in cfg.sections()}, cfg
+
+
+class PatternWatcher:
+    def __init__(self, file, interval=.5):
+        self.file = file
+        self.interval = interval
+        self.changes = deque()      # (stamp, sections, stamp compared to, {section: test} or None to reload all)
+        self._base = None           # Sections of the file as loaded, and its stamp.
+        self._base_stamp = None
+        self._seen = None
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._watch, name="pattern-watch", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            if not self.file.pattern_file or not hasattr(self.file, "pattern_stamp"):
+                continue
+            path = resource_path(self.file.pattern_file)
+            try:
+                stat = os.stat(path)
+            except OSError:
+                continue
+            stamp = [stat.st_mtime_ns, stat.st_size]
+            loaded = self.file.pattern_stamp
+            if stamp == loaded:
+                if self._base_stamp != loaded:     # A new file or reload; remember what it looked like.
+                    parsed = readSections(path)
+                    self._base, self._base_stamp = (parsed[0] if parsed else None), loaded
+                continue
+            if stamp == self._seen:
+                continue
+            self._seen = stamp
+            parsed = readSections(path)
+            if parsed is None:
+                print("Pattern file has errors; keeping the loaded patterns.")
+                continue
+            sections, cfg = parsed
+            self.changes.append((stamp, sections, loaded, self._compileChanges(sections, cfg, loaded)))
+
+    def _compileChanges(self, sections, cfg, loaded):
+        if self._base is None or self._base_stamp != loaded:
+            return None
+        if any(sections.get(name) != self._base.get(name) for name in STRUCTURE):
+            return None
+        updates = {}
+        for name, items in sections.items():
+            if name in STRUCTURE or items == self._base.get(name):
+                continue
+            try:
+                test = patternToDict(name, cfg)
+            except (KeyError, ValueError, IndexError):
+                print(f"Pattern [{name}] has errors; keeping the loaded version.")
+                continue
+            convertResolution([], [test], self.file.original_scale, self.file.pattern_scale,
+                              self.file.pattern_translation)
+            test["enabled_changed"] = items.get("enabled") != self._base.get(name, {}).get("enabled")
+            updates[name] = test
+        return updates
+
+    def apply(self, speedrun):     # Detection thread, between frames.
+        while self.changes:
+            stamp, sections, loaded, updates = self.changes.popleft()
+            if self.file.pattern_stamp != loaded:   # Reloaded meanwhile; look at the file again.
+                self._seen = None
+                continue
+            if updates is None:
+                if self.file.loadPattern():
+                    speedrun.loadFile()
+                    print("Pattern file reloaded.")
+                continue
+            changed = set()
+            for test in self.file.all_patterns:
+                update = updates.get(test["name"][3:])
+                if update is not None:
+                    test["area"] = list(update["area"])
+                    test["properties"] = copy.deepcopy(update["properties"])
+                    test["threshold"] = update["threshold"]
+                    test["action"] = update["action"]
+                    if update["enabled_changed"]: test["enabled"] = update["enabled"]
+                    changed.add(test["name"][3:])
+            self.file.pattern_stamp = stamp
+            self._base, self._base_stamp = sections, stamp
+            if changed:
+                print("Reloaded patterns:", ", ".join(sorted(changed)))
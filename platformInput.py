@@ -0,0 +1,135 @@
+import time
+import ctypes
+import threading
+from warnings import warn
+
+# Windows mouse/focus and global keyboard access. Each backend is optional so the
+# detection engine can run where pywin32 or keyboard are not installed. Both are imported
+# on first use rather than at startup; can_click, can_focus and can_hook trigger the import.
+win32api = win32con = win32gui = None
+keyboard = None
+_loaded = False
+
+KEY_DOWN = "down"
+KEY_UP = "up"
+
+
+# ---Functions---
+
+def _load():
+    global win32api, win32con, win32gui, keyboard, can_click, can_focus, can_hook, _loaded
+    try:
+        import win32api, win32con
+        import win32gui
+    except ImportError:
+        win32api = win32con = win32gui = None
+    try:
+        import keyboard
+    except ImportError:
+        keyboard = None
+    can_click = win32api is not None
+    can_focus = win32gui is not None
+    can_hook = keyboard is not None
+    _loaded = True
+
+
+def __getattr__(name):
+    if name in ("can_click", "can_focus", "can_hook") and not _loaded:
+        _load()
+        return globals()[name]
+    raise AttributeError(f"module 'platformInput' has no attribute '{name}'")
+
+
+def click(x, y, multi=1):
+    if not _loaded: _load()
+    if not can_click:
+        warn("platformInput: Mouse clicks unavailable (pywin32 not installed)", RuntimeWarning)
+        return
+    for n in range(multi):
+        win32api.SetCursorPos((x, y))
+        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTDOWN, x, y, 0, 0)
+        win32api.SetCursorPos((x, y))
+        win32api.mouse_event(win32con.MOUSEEVENTF_LEFTUP, x, y, 0, 0)
+
+
+def change_mouse_speed(speed):
+    if not _loaded: _load()
+    if not can_click: return
+    set_mouse_speed = 113   # 0x0071 for SPI_SETMOUSESPEED
+    ctypes.windll.user32.SystemParametersInfoA(set_mouse_speed, 0, speed, 0)
+
+
+def get_mouse_speed():
+    if not _loaded: _load()
+    if not can_click: return 10
+    get_mouse_speed = 112   # 0x0070 for SPI_GETMOUSESPEED
+    speed = ctypes.c_int()
+    ctypes.windll.user32.SystemParametersInfoA(get_mouse_speed, 0, ctypes.byref(speed), 0)
+    return speed.value
+
+
+def foregroundTitle():      # Title of the focused window, or None when focus can't be queried.
+    if not _loaded: _load()
+    if not can_focus: return None
+    return win32gui.GetWindowText(win32gui.GetForegroundWindow())
+
+
+def sendKey(key):
+    if not _loaded: _load()
+    if not can_hook:
+        warn("platformInput: Key presses unavailable (keyboard not installed)", RuntimeWarning)
+        return
+    keyboard.send(key)
+
+
+def hookKeys(callback, suppress=False):
+    if not _loaded: _load()
+    if not can_hook: return None
+    return keyboard.hook(callback, suppress)
+
+
+def unhookKeys(hook):
+    if hook is not None: keyboard.unhook(hook)
+
+
+# ---Classes---
+
+class ActionSequence:   # Key presses and clicks sent from their own thread, `delay` seconds apart.
+    def __init__(self, actions, delay, mouse_speed=1):
+        self.actions = actions      # [["press", key] or ["click", [x, y]]], as stringToActions() reads them.
+        self.delay = delay
+        self.mouse_speed = mouse_speed
+        self.position = 0           # Actions sent so far.
+        self.finished = False       # All sent and the last delay has passed.
+        self.error = None           # What stopped the sequence, if sending an action raised.
+        self._cancel = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="input-sequence", daemon=True)
+        self._thread.start()
+
+    def cancel(self):
+        self._cancel.set()
+
+    def _run(self):
+        speed = get_mouse_speed()
+        change_mouse_speed(self.mouse_speed)
+        began = time.perf_counter()
+        try:
+            for n, (kind, argument) in enumerate(self.actions):
+                if not self._waitUntil(began + n * self.delay): return
+                if kind == "press":
+                    sendKey(argument)
+                elif kind == "click":
+                    click(argument[0], argument[1], 1)
+                self.position = n + 1
+            self.finished = self._waitUntil(began + len(self.actions) * self.delay)
+        except Exception as e:     # Reported by the detection loop, which stops the sequence.
+            self.error = e
+        finally:
+            change_mouse_speed(speed)
+
+    def _waitUntil(self, due):  # Sleeps to within 2 ms of `due`, then spins. False when cancelled.
+        while True:
+            left = due - time.perf_counter()
+            if self._cancel.is_set(): return False
+            if left <= 0: return True
+            if left > .002: self._cancel.wait(left - .002)
@@ -1,54 +1,242 @@
 import numpy
-import mss.tools
 import cv2
 import time
+import os
+import atexit
+import eventTrace
+from frameArchive import FrameArchive
+from timing import StageProfiler
+
+# Set SPLITRP_PROFILE to time every capture stage and test: "1" prints the timings at exit, a path appends them.
+profiler = None
 
 # ---Classes---
 
 
 class screenTest:
-    def __init__(self, cap_area, tests):
+    def __init__(self, cap_area, tests, source=None):
         self.cap_area = cap_area
         self.tests = tests
+        self.source = source if source is not None else ScreenSource()
         self.last_test = {"name": "Uninitialized", "action": "None"}
-        self.shot_history = [screenShot(cap_area)]
+        first = self.source.grab(cap_area)
+        self.shot_history = [first, first.copy()]
+        self._rows = [None] * len(tests)    # Thresholded scanline per test, reused every frame.
+        if profiler is not None:
+            self.test = self._profiledTest
 
     def test(self):
-        self.screen = screenShot(self.cap_area)
-        self.shot_history = [self.screen, self.shot_history[0]]
-        for test in self.tests:
+        if eventTrace.active is not None: self.frame_ns = time.perf_counter_ns()
+        history = self.shot_history
+        self.screen = self.source.grab(self.cap_area, history[1])     # The oldest frame's buffer is reused.
+        history[1] = history[0]
+        history[0] = self.screen
+        rows = self._rows
+        if len(rows) != len(self.tests): rows = self._rows = [None] * len(self.tests)
+        for n in range(len(self.tests)):
+            test = self.tests[n]
             if test["enabled"]:
-                test_area = getRow(self.screen, test["area"], test["threshold"])
-                if matchPattern(test_area, test["properties"]):
+                rows[n] = getRow(self.screen, test["area"], test["threshold"], rows[n])
+                if matchPattern(rows[n], test["properties"]):
                     self.last_time = time.time()
                     self.last_test = test
+                    if eventTrace.active is not None:
+                        eventTrace.active.detection(test["name"], 1.0, self.frame_ns)
                     return True
         return False
 
+    def _profiledTest(self):     # test(), timing each stage. Only bound when profiling is enabled.
+        clock = time.perf_counter_ns
+        t0 = self.frame_ns = clock()
+        shot = self.source.capture(self.cap_area)
+        t1 = clock()
+        history = self.shot_history
+        self.screen = self.source.convert(shot, history[1])
+        t2 = clock()
+        profiler.stage("capture").add(t1 - t0)
+        profiler.stage("gray").add(t2 - t1)
+        history[1] = history[0]
+        history[0] = self.screen
+        rows = self._rows
+        if len(rows) != len(self.tests): rows = self._rows = [None] * len(self.tests)
+        for n in range(len(self.tests)):
+            test = self.tests[n]
+            if test["enabled"]:
+                t0 = clock()
+                rows[n] = getRow(self.screen, test["area"], test["threshold"], rows[n])
+                t1 = clock()
+                matched = matchPattern(rows[n], test["properties"])
+                t2 = clock()
+                profiler.stage("threshold").add(t1 - t0)
+                profiler.stage("match").add(t2 - t1)
+                profiler.test(test["name"]).add(t2 - t0)
+                if matched:
+                    self.last_time = time.time()
+                    self.last_test = test
+                    if eventTrace.active is not None:
+                        eventTrace.active.detection(test["name"], 1.0, self.frame_ns)
+                    return True
+        return False
+
+
+# Frame sources hand screenTest its images. The live source captures each area on demand;
+# recorded sources hold one full-screen frame at a time, cropped per area, and step on advance().
+# grab() and convert() may write into `out`, a previous frame the caller no longer needs.
+
+class ScreenSource:
+    def __init__(self):
+        self._sct = None    # One mss handle for the whole run, opened on first capture.
+
+    def advance(self): return True
+
+    def grab(self, area, out=None): return self.convert(self.capture(area), out)
+
+    def capture(self, area):
+        if self._sct is None:
+            import mss      # Only the live source needs it.
+            self._sct = mss.mss()
+        return self._sct.grab(area)
+
+    def convert(self, shot, out=None):
+        bgra = numpy.frombuffer(shot.raw, numpy.uint8).reshape(shot.height, shot.width, 4)
+        if out is None or out.shape != bgra.shape[:2]:
+            out = numpy.empty(bgra.shape[:2], numpy.uint8)
+        return cv2.cvtColor(bgra, cv2.COLOR_BGRA2GRAY, dst=out)
+
+    def time(self): return time.time()
+
+
+class RecordedSource:
+    def __init__(self, realtime=False, rate=60.0):
+        self.realtime = realtime
+        self.rate = rate
+        self.index = -1
+        self.frame = None
+        self._gray = [None, None]   # Color frames convert into these in turn, so the last frame stays valid.
+        self._began = time.time()
+        if not self.advance():
+            raise ValueError("Frame source contains no frames.")
+
+    def _read(self): return None
+
+    def advance(self):
+        frame = self._read()
+        if frame is None:
+            return False
+        if frame.ndim == 3:
+            self._gray.reverse()
+            if self._gray[0] is None or self._gray[0].shape != frame.shape[:2]:
+                self._gray[0] = numpy.empty(frame.shape[:2], numpy.uint8)
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray[0])
+        self.frame = frame
+        self.index += 1
+        if self.realtime:   # Hold each frame until its place in the recording's timeline.
+            wait = self._began + self.index / self.rate - time.time()
+            if wait > 0: time.sleep(wait)
+        return True
+
+    def grab(self, area, out=None):
+        return self.frame[area["top"]:area["top"] + area["height"], area["left"]:area["left"] + area["width"]]
+
+    def capture(self, area): return self.grab(area)
+
+    def convert(self, shot, out=None): return shot
+
+    def time(self): return self.index / self.rate
+
+
+class VideoSource(RecordedSource):
+    def __init__(self, path, realtime=False, start_frame=0):
+        self.video = cv2.VideoCapture(path)
+        if not self.video.isOpened():
+            raise ValueError(f"Unable to open video: {path}")
+        if start_frame:
+            self.video.set(cv2.CAP_PROP_POS_FRAMES, start_frame)
+        self._decoded = None    # Decode buffer, reused once the first frame fixes its size.
+        super().__init__(realtime, self.video.get(cv2.CAP_PROP_FPS) or 60.0)
+        self.index += start_frame
+
+    def _read(self):
+        ok, frame = self.video.read(self._decoded)
+        if not ok:
+            return None
+        self._decoded = frame
+        return frame
+
+
+class ImageSource(RecordedSource):    # A sequence of image paths, or a FrameArchive.
+    def __init__(self, frames, realtime=False, rate=60.0):
+        self.frames = frames
+        self._next = 0
+        super().__init__(realtime, rate)
+
+    def _read(self):
+        if self._next >= len(self.frames):
+            return None
+        frame = self.frames[self._next]
+        self._next += 1
+        if isinstance(frame, str):
+            frame = cv2.imread(frame, cv2.IMREAD_UNCHANGED)
+        return frame
 
 
 # ---Functions---
 
+def openSource(path=None, realtime=False, rate=60.0):   # Pick a frame source from a path. None = live screen.
+    if path is None or path == "screen":
+        return ScreenSource()
+    if os.path.isdir(path):
+        images = sorted(os.path.join(path, n) for n in os.listdir(path)
+                        if os.path.splitext(n)[1].lower() in (".png", ".jpg", ".bmp"))
+        return ImageSource(images, realtime, rate)
+    base, ext = os.path.splitext(path)
+    if ext in (".rpa", ".rpi"):
+        return ImageSource(FrameArchive(base), realtime, rate)
+    return VideoSource(path, realtime)
+
+
 def showImage(img, wait=0):
     cv2.imshow("imgWin", img)
     cv2.waitKey(wait)
     cv2.destroyAllWindows()
 
 
-def screenShot(area):
+def enableProfiling(dump_to=None):   # Must run before the screenTests to be profiled are created.
+    global profiler
+    if profiler is None:
+        profiler = StageProfiler()
+    if dump_to is not None:     # "1" prints at exit, anything else is a path to append to.
+        atexit.register(dumpProfile, None if dump_to == "1" else dump_to)
+    return profiler
+
+
+def dumpProfile(path=None):
+    if profiler is not None:
+        profiler.dump(path)
+
+
+def grabScreen(area):
+    import mss
     with mss.mss() as sct:
-        shot = numpy.array(sct.grab(area))
-    shot = cv2.cvtColor(shot, cv2.COLOR_BGR2GRAY)
-    return shot
+        return numpy.array(sct.grab(area))
+
+
+def toGray(shot): return cv2.cvtColor(shot, cv2.COLOR_BGR2GRAY)
 
-def getRow(img, area, thresh):
+
+def screenShot(area):
+    return toGray(grabScreen(area))
+
+def getRow(img, area, thresh, out=None):   # Thresholds into `out` when it is the right size.
     if area[0] > area[2]:
         step = -1
     else:
         step = 1
     ar = img[area[1]:area[1]+1, area[0]:area[2]: step]
-    ar = cv2.threshold(ar, thresh, 255, cv2.THRESH_BINARY)[1]
-    return ar
+    if out is None or out.shape != ar.shape:
+        out = numpy.empty(ar.shape, numpy.uint8)
+    cv2.threshold(ar, thresh, 255, cv2.THRESH_BINARY, dst=out)
+    return out
 
 
 def matchPattern(img, properties):
@@ -92,3 +280,7 @@ def detectSolid(img, solids, match, origin=0):
         if len(sliced) > 0 and numpy.mean(sliced[0]) != match:
             return False
     return True
+
+
+if os.environ.get("SPLITRP_PROFILE"):
+    enableProfiling(os.environ["SPLITRP_PROFILE"])
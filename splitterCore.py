@@ -0,0 +1,382 @@
+import time
+import socket
+from select import select as select
+from screenMonitoring import screenTest, ScreenSource
+from confighandler import randomList
+from timing import LoopTimer
+from patternWatcher import PatternWatcher
+import platformInput
+import eventTrace
+
+# The autosplitter state machine and its LiveSplit connection. Nothing here touches Tk or win32 directly:
+# display goes through a view object (GUI_v2.GUI, or headless.HeadlessView) and input through platformInput.
+
+
+class LivesplitClient(socket.socket):
+    def __init__(self, host=None, port=16834, timeout=3, view=None):
+        self.host, self.port = None, None
+        self.view = view
+        self.connected = False
+        self._lastattempt = time.time() - timeout
+        self.attempt = 1
+        self.reconnects = -1
+        self.commands = 0
+        self.last_rtt = 0.0
+        self._sent = 0.0
+
+        if host is not None:
+            self.connect(host, port, timeout)
+
+    def connect(self, host, port=16834, timeout=3):
+        if time.time() - self._lastattempt > timeout:
+            if self.connected: self.close()
+            super().__init__(socket.AF_INET, socket.SOCK_STREAM)
+            self.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)     # Commands are tiny; don't let Nagle hold them.
+            self.setblocking(False)
+            self.view.updateStatus(f"Livesplit Connect [{self.attempt}]")
+
+            self.connect_ex((host, port))
+            ready_to_read, ready_to_write, in_error = select([], [self], [], 0)
+            # A refused connection also selects as writable; SO_ERROR tells them apart.
+            if not ready_to_write or self.getsockopt(socket.SOL_SOCKET, socket.SO_ERROR):
+                self.connected = False
+                self._lastattempt = time.time()
+                self.attempt += 1
+            else:
+                self.host, self.port = host, port
+                self.connected = True
+                self.attempt = 1
+                self.reconnects += 1
+                self.setblocking(True)
+                self.view.updateStatus("Livesplit Connected")
+        return self.connected
+
+    def send(self, *args):
+        self.view.signalCommand()
+        if eventTrace.active is not None: eventTrace.active.command(args[0].decode())
+        self.commands += 1
+        try:
+            self._sent = time.perf_counter()
+            super().send(*args)
+        except:
+            self.view.updateStatus("Livesplit Disconnected")
+            self.connected = False
+            return False
+        return True
+
+    def recv(self, *args):
+        try:
+            out = super().recv(*args).decode()
+            self.last_rtt = time.perf_counter() - self._sent
+        except:
+            out = "Dead Jim"
+            self.view.updateStatus("Livesplit Disconnected")
+            self.connected = False
+        return out
+
+
+class autoSplitter:
+    def __init__(self, livesplit, source=None):
+        self.livesplit = livesplit
+        self.source = source if source is not None else ScreenSource()
+        self.active = True
+        self.save_on_exit = True
+        self.false_splits = 0
+        self.loop_timer = LoopTimer()
+        self._current_state = "reconnect"
+        self._last_state = "wait"
+        self._last_detected = ""
+        self._last_reset = time.time()
+        self._active_buffer = 3
+        self._keysdown = {}
+        self.watcher = None
+        self.roulette_sequence = None
+
+    def _getState(self): return self._current_state
+
+    def _setState(self, state):
+        if eventTrace.active is not None and state != self._current_state:
+            eventTrace.active.transition(self._current_state, state)
+        self._current_state = state
+
+    _state = property(_getState, _setState)
+
+    def loadFile(self):
+        if self.livesplit.connected:
+            self.view.load_patterns(self.file.all_patterns)
+        self.standby_monitor = screenTest(self.file.start_screen, self.file.standby_patterns, self.source)
+        self.prerun_monitor = screenTest(self.file.start_screen, self.file.prerun_patterns, self.source)
+        self.run_monitor = screenTest(self.file.run_screen, self.file.run_patterns, self.source)
+        self.prerun_monitor.last_test["name"] = None
+        self.view.highlight_pattern()
+
+    def reset(self):
+        self.view.highlight_pattern()
+        if self.file.pattern_file != "":
+            self._state = "armed"
+            self.view.updateStatus("- RESET -")
+        else:
+            self._state = "wait"
+            self.view.updateStatus("Select file to load")
+        self._last_found_time = time.time()
+        self._last_dropped_time = time.time()
+        self._last_reset = time.time() + .5
+        self._cancelRoulette()
+        if self.file.roulette:
+            self.roulette_current = 0
+            self.roulette_order = randomList(self.file.roulette_total, self.file.roulette_final)
+
+    def testHotkey(self, event):
+        if event.event_type == platformInput.KEY_DOWN:
+            self._keysdown[event.name] = event.scan_code
+        elif event.event_type == platformInput.KEY_UP:
+            self._keysdown = {}
+        for key in self.file.reset_key:
+            if key not in self._keysdown:
+                return
+            if self.file.reset_key[key] != self._keysdown[key]:
+                return
+        if self._last_reset < time.time(): self._state = "reset"
+
+    def _testLivesplit(self):
+        if not self.livesplit.connected:
+            if self._state != "wait":
+                self.view.showLivesplitLost()
+                self.view.updateStatus("Seeking Livesplit Host")
+                self.view.update()
+                try:
+                    socket.gethostbyname(self.file.livesplit_host)
+                except socket.gaierror:
+                    self.view.updateStatus("ERROR: Invalid Server Host")
+                    self.livesplit.connected = True
+            if not self.livesplit.connected and self.livesplit.connect(self.file.livesplit_host, self.file.livesplit_port):
+                self.view.showLivesplitFound()
+                self._state = "reset"
+            else:
+                self._state = "wait"
+
+    def mainloop(self, file, view):
+        self.file, self.view = file, view
+        self.livesplit.view = view
+        if self.file.pattern_file != "": self.loadFile()
+        self._keyhook = platformInput.hookKeys(self.testHotkey)
+        if self.file.watch_patterns: self.watcher = PatternWatcher(self.file)
+
+        while True:
+            if self._testClosing(): return
+            if self.watcher is not None and self.watcher.changes: self.watcher.apply(self)
+            self._testLivesplit()
+            if self._state == "wait": time.sleep(1 / 140)
+            if self._state == "reconnect": self.livesplit.connected = False
+            elif self._state == "reset": self.reset()
+            elif self.active and self.file.pattern_file != "":
+                if self.livesplit.connected: self._testActive()
+                if self._state == "standby": self._standby()
+                elif self._state == "armed": self._ready(True)
+                elif self._state == "ready": self._ready()
+                elif self._state == "running": self._running()
+                elif self._state == "pause": self._pause()
+                elif self._state == "roulette": self._ready()
+            self.view.updateFPS(self.loop_timer.update())
+            if not self.source.advance(): self.view.closing = True
+
+    def updateDetected(self, detection_name):
+        if self._last_detected != detection_name or self._state != self._last_state:
+            self.view.highlight_pattern(detection_name)
+            self.view.signalDetection(self._state != self._last_state)
+        self._last_detected = detection_name
+
+    def _testClosing(self):
+        if self.view.closing:
+            platformInput.unhookKeys(self._keyhook)
+            if self.watcher is not None: self.watcher.stop()
+            self._cancelRoulette()
+            if self.save_on_exit:
+                self.view.storePosition()
+                self.file.saveSettings()
+                self.file.savePattern()
+            return True
+        return False
+
+    def _testActive(self):
+        if self.file.lock_to_window and platformInput.can_focus:
+            if self.file.game_title != platformInput.foregroundTitle():
+                if self._state != "wait":
+                    if self._state != "running" and self._state != "armed":
+                        self._active_buffer = 0
+                    self._last_state = self._state
+                    self._state = "wait"
+                    if self.file.pause_when_inactive:
+                        if not self.livesplit.send("pausegametime\r\n".encode()): self._state = "reconnect"
+                    self.view.updateStatus("Game window not active")
+                    self.view.showInactive()
+            else:
+                if self._state == "wait":
+                    if self._active_buffer < 3:
+                        if self._last_state == "pause":
+                            detected = self.run_monitor.test()
+                        else:
+                            detected = self.prerun_monitor.test()
+                        if detected:
+                            self._active_buffer += 1
+                        else:
+                            self._active_buffer = 0
+                    elif self.livesplit.connected:
+                        self._state = self._last_state
+                        if self.file.pause_when_inactive and self._state != "pause":
+                            if not self.livesplit.send("unpausegametime\r\n".encode()): self._state = "reconnect"
+                        self.view.showActive()
+                        self.view.updateStatus("Returned to game")
+
+    def _testFalseSplit(self, last_time):
+        # Save false-positives for pattern review.
+        if time.time() - last_time < self.file.false_split_period:
+            if not self.livesplit.send("unsplit\r\n".encode()): self._state = "reconnect"
+            self.false_splits += 1
+            img = self.run_monitor.shot_history[1]
+            self.file.falsies.append(img, last_time, self.run_monitor.last_test["name"], self._state)
+
+    def _standby(self):
+        if self._state != self._last_state:
+            self._last_state = self._state
+            self.view.colorLED(2)
+            self.view.updateStatus("Standby mode")
+        if self.standby_monitor.test():
+            self._state = "armed"
+        self.updateDetected(self.standby_monitor.last_test["name"])
+
+    def _ready(self, seek=False):
+        if self._state != self._last_state:
+            self._last_state = self._state
+            self.view.colorLED(1)
+            if seek:
+                self.view.updateStatus("Armed and Seeking")
+            else:
+                self.view.updateStatus("Ready to begin")
+        else:
+            detected = self.prerun_monitor.test()
+            if self._state == "roulette" and self.roulette_sequence is not None and not self._rouletteDone(detected):
+                self.updateDetected(self.prerun_monitor.last_test["name"])
+                return
+            if detected and self._state != "roulette":
+                if self.prerun_monitor.last_test["action"] == "STANDBY":
+                    self._state = "standby"
+                elif seek:
+                    self._state = "ready"
+            elif not seek:
+                if self.file.roulette:
+                    if self._state == "ready":
+                        self.rouletteSelect()
+                        return
+                    else:
+                        if len(self.roulette_order) == self.file.roulette_total - 1:
+                            if not self.livesplit.send("unpausegametime\r\nstarttimer\r\nsetgametime 0.0\r\n".encode()):
+                                self._state = "reconnect"
+                        elif not self.livesplit.send("unpausegametime\r\n".encode()): self._state = "reconnect"
+                else:
+                    if not self.livesplit.send((self.prerun_monitor.last_test["action"]).encode()): self._state = "reconnect"
+                self._state = "running"
+            self.updateDetected(self.prerun_monitor.last_test["name"])
+
+    def _running(self):
+        if self._state != self._last_state:
+            self._last_state = self._state
+            self.view.colorLED(0)
+            self.updateDetected("RT:Running")
+            self.view.updateStatus("Speedrunning!")
+        if self.run_monitor.test():
+            self._state = "pause"
+            if not self.livesplit.send(self.run_monitor.last_test["action"].encode()): self._state = "reconnect"
+
+            if self.run_monitor.last_test["action"].find("split") != -1:
+                if self.file.roulette:
+                    self._state = "ready"
+                else:
+                    if self.file.autoclicker_active and self.file.auto_click is not None:
+                        platformInput.click(self.file.auto_click[0], self.file.auto_click[1], 3)
+
+                # Ask livesplit if the run is over. If so, reset internal run-state.
+                if not self.livesplit.send("getcurrenttimerphase\r\n".encode()): self._state = "reconnect"
+                if self.livesplit.recv(1024)[:-2] == "Ended":
+                    self.view.updateStatus("- Run Complete -")
+                    self._state = "reset"
+                    return
+
+                # Save false-negatives for pattern review.
+                self._testFalseSplit(self._last_found_time)
+                self._last_found_time = time.time()
+
+    def _pause(self):
+        if self._state != self._last_state:
+            self.view.updateStatus(f"Found: {self.run_monitor.last_test['name'][3:]}")
+            self._last_state = self._state
+            self.view.colorLED(0)
+        if not self.run_monitor.test():
+            self._state = "running"
+            if not self.livesplit.send("unpausegametime\r\n".encode()): self._state = "reconnect"
+            self._testFalseSplit(self._last_dropped_time)       # Save false positives for pattern review.
+            self._last_dropped_time = time.time()
+        self.updateDetected(self.run_monitor.last_test["name"])
+
+    def rouletteSelect(self):
+        if not self.roulette_order:
+            self._state = "reset"
+            return
+
+        level = self.roulette_order[0]
+        self.view.updateStatus(
+            f"Loading level: {level} [{self.file.roulette_total - len(self.roulette_order)} of {self.file.roulette_total}]")
+        print("Loading Level:",level)
+
+        # The clicks go out on their own thread; the loop keeps testing frames while they do.
+        actions = [list(action) for action in self.file.roulette_backout] if self._state == "ready" else []
+        self._roulette_positions = [self.roulette_current] * len(actions)
+        self._roulette_backout = len(actions)
+        route = self.file.roulette_plan[self.roulette_current][level]
+        if route is None:
+            self.view.updateStatus(f"No roulette clicks reach level {level}; skipped")
+            self.roulette_order = self.roulette_order[1:]
+            return
+        current = self.roulette_current
+        for page in route[0]:
+            step, (x, y) = self.file.roulette_page_clicks[page]
+            current += step
+            actions.append(["click", [x, y]])
+            self._roulette_positions.append(current)
+        x, y = self.file.roulette_clicks[route[1]][1]
+        actions += [["click", [x, y]], ["click", [x, y]]]    # Select the level, then play it.
+        self._roulette_positions += [current, current]
+
+        self._roulette_seen = time.time()
+        self.roulette_sequence = platformInput.ActionSequence(actions, self.file.roulette_delay)
+        self._state = "roulette"
+
+    def _rouletteDone(self, detected):
+        # True once the last click's delay has passed. Until the last click the level select must stay in view after
+        # the backout; if it is lost for longer than two click delays, a click went astray and the selection restarts.
+        sequence = self.roulette_sequence
+        if sequence.error is not None:      # Retrying would fail the same way; wait in standby for the menu.
+            print("Roulette input failed:", repr(sequence.error))
+            self._cancelRoulette()
+            self.view.updateStatus(f"Roulette input failed: {sequence.error}")
+            self._state = "standby"
+            return False
+        if sequence.finished:
+            self.roulette_current = self._roulette_positions[-1]
+            self.roulette_order = self.roulette_order[1:]
+            self.roulette_sequence = None
+            return True
+        if detected or sequence.position <= self._roulette_backout or sequence.position == len(sequence.actions):
+            self._roulette_seen = time.time()
+        elif time.time() - self._roulette_seen > 2 * self.file.roulette_delay:
+            self._cancelRoulette()
+            self.view.updateStatus("Level select lost, selecting again")
+            self._state = "ready"
+        return False
+
+    def _cancelRoulette(self):
+        sequence = self.roulette_sequence
+        if sequence is not None:
+            sequence.cancel()
+            if sequence.position: self.roulette_current = self._roulette_positions[sequence.position - 1]
+            self.roulette_sequence = None
@@ -1,4 +1,5 @@
 import time
+from array import array
 
 
 # ---Functions---
@@ -21,22 +22,53 @@ def HMStoSecs(hms):     # Convert text [Hours:Minutes:Seconds.milliseconds] to f
 
 
 # ---Classes---
-class FPSTimer:
-    def __init__(self, interval=1.0):
-        self.fps = 1.0
-        self.interval = interval
+class LoopTimer:    # Rolling window of per-iteration durations, stored in a preallocated array.
+    def __init__(self, size=1024, interval=.5, spike_factor=3.0):
+        self.size = size
+        self.interval = interval            # Seconds between recalculations of the summary.
+        self.spike_factor = spike_factor    # A gap this many times the median counts as a spike.
+        self.durations = array("d", bytes(8 * size))
         self.reset()
 
     def reset(self):
-        self._began = time.time()
-        self._frame_count = 0
+        self._next = 0
+        self._filled = 0
+        self._last = None
+        self._summarized = 0.0
+        self._spike_limit = float("inf")
+        self.spikes = 0
+        self.worst_spike = 0.0
+        self.summaries = 0      # Counts summarize() calls, so displays can skip redrawing unchanged figures.
+        self.fps = self.p50 = self.p95 = self.p99 = self.max = 0.0
 
     def update(self):
-        self._frame_count += 1
-        if time.time() > self._began + self.interval:
-            self.fps = self._frame_count / (time.time() - self._began)
-            self.reset()
-        return self.fps
+        now = time.perf_counter()
+        if self._last is not None:
+            gap = now - self._last
+            self.durations[self._next] = gap
+            self._next = (self._next + 1) % self.size
+            if self._filled < self.size: self._filled += 1
+            if gap > self._spike_limit:
+                self.spikes += 1
+                if gap > self.worst_spike: self.worst_spike = gap
+        self._last = now
+        if now - self._summarized > self.interval:
+            self.summarize(now)
+        return self
+
+    def summarize(self, now=None):  # Recalculate fps and percentiles. Runs every `interval` seconds from update().
+        self._summarized = time.perf_counter() if now is None else now
+        self.summaries += 1
+        if not self._filled:
+            return
+        window = sorted(self.durations[:self._filled])
+        last = self._filled - 1
+        self.fps = self._filled / sum(window) if window[-1] else 0.0
+        self.p50 = window[int(last * .50)]
+        self.p95 = window[int(last * .95)]
+        self.p99 = window[int(last * .99)]
+        self.max = window[-1]
+        self._spike_limit = self.p50 * self.spike_factor
 
 
 class Stopwatch:
@@ -68,3 +100,59 @@ class Stopwatch:
 
     def add(self, seconds):
         self._began -= seconds
+
+
+class Histogram:    # Fixed-size log2 histogram of nanosecond durations. Bucket n holds values below 2**n ns.
+    def __init__(self, buckets=40):
+        self.counts = [0] * buckets
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    def add(self, ns):
+        bucket = ns.bit_length()
+        self.counts[bucket if bucket < len(self.counts) else -1] += 1
+        self.count += 1
+        self.total += ns
+        if ns > self.max: self.max = ns
+
+    def mean(self): return self.total / self.count if self.count else 0.0
+
+    def percentile(self, p):    # Upper bound of the bucket holding the p-th fraction of samples.
+        target = p * self.count
+        seen = 0
+        for bucket in range(len(self.counts)):
+            seen += self.counts[bucket]
+            if seen >= target and seen:
+                return min(2 ** bucket, self.max)
+        return self.max
+
+
+class StageProfiler:
+    def __init__(self):
+        self.stages = {}
+        self.tests = {}
+
+    def stage(self, name):
+        if name not in self.stages: self.stages[name] = Histogram()
+        return self.stages[name]
+
+    def test(self, name):
+        if name not in self.tests: self.tests[name] = Histogram()
+        return self.tests[name]
+
+    def report(self):
+        lines = [f"{'':32s} {'count':>9s} {'mean us':>9s} {'p50 us':>9s} {'p99 us':>9s} {'max us':>9s}"]
+        for title, table in (("-- stages --", self.stages), ("-- tests --", self.tests)):
+            lines.append(title)
+            for name, h in table.items():
+                lines.append(f"{name[:32]:32s} {h.count:9d} {h.mean() / 1e3:9.1f} {h.percentile(.5) / 1e3:9.1f} "
+                             f"{h.percentile(.99) / 1e3:9.1f} {h.max / 1e3:9.1f}")
+        return "\n".join(lines)
+
+    def dump(self, path=None):
+        if path is None:
+            print(self.report())
+        else:
+            with open(path, "a") as f:
+                f.write(f"--- {time.strftime('%Y-%m-%d %H:%M:%S')} ---\n{self.report()}\n")
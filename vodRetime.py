@@ -0,0 +1,278 @@
+import os
+import sys
+import csv
+import time
+import argparse
+import tempfile
+import multiprocessing
+import cv2
+import numpy
+from confighandler import fileAccess
+from screenMonitoring import screenTest, VideoSource
+from splitterCore import autoSplitter
+from livesplitEmulator import SplitTimer
+from headless import HeadlessView
+from timing import secsToHMS
+
+# Retimes a recorded run from a local video file. Detection is the slow part and depends on nothing but the frame,
+# so the video is cut into chunks that worker processes decode and test on their own: every frame gets the pattern
+# each group (standby, prerun, runtime) would match. The chunks are stitched back in frame order and the real
+# autoSplitter state machine then replays them on the video's clock, driving a SplitTimer instead of LiveSplit.
+#   python vodRetime.py clustertruck.cfg run.mp4
+#   python vodRetime.py clustertruck.cfg run.mp4 --segments 10 --csv run_times.csv
+
+GROUPS = ("standby", "prerun", "runtime")
+_worker = {}
+
+
+class DetectionSource:      # Steps through the stitched detections; its clock is the video's.
+    def __init__(self, frames, rate):
+        self.frames = frames
+        self.rate = rate
+        self.index = 0
+
+    def advance(self):
+        self.index += 1
+        return self.index < self.frames
+
+    def time(self): return self.index / self.rate
+
+
+class ReplayedTest:     # A screenTest that answers from precomputed detections.
+    def __init__(self, tests, detections, source):
+        self.tests = tests
+        self.detections = detections
+        self.source = source
+        self.last_test = {"name": "Uninitialized", "action": "None"}
+        self.shot_history = [None, None]
+
+    def test(self):
+        found = self.detections[self.source.index]
+        if found < 0:
+            return False
+        self.last_test = self.tests[found]
+        self.last_time = self.source.time()
+        return True
+
+
+class TimerClient:      # Stands in for LivesplitClient. Commands go straight to a SplitTimer at the video's time.
+    def __init__(self, timer, source):
+        self.timer = timer
+        self.source = source
+        self.connected = True
+        self.view = None
+        self.reconnects = 0
+        self.commands = 0
+        self.last_rtt = 0.0
+        self.runs = []          # [(start time, [(real, game) per split], final real, final game)]
+        self._started = None
+        self._reply = ""
+
+    def connect(self, host=None, port=None, timeout=None):
+        self.connected = True
+        return True
+
+    def send(self, data):
+        now = self.source.time()
+        self.commands += 1
+        for line in data.decode().split("\r\n"):
+            if not line:
+                continue
+            if line.split(" ")[0].lower() == "starttimer":
+                self.endRun(now)    # Each start in a recording begins a new run.
+                self._started = now
+            reply = self.timer.command(line, now)
+            if reply is not None:
+                self._reply = reply + "\r\n"
+        return True
+
+    def recv(self, *args):
+        reply, self._reply = self._reply, ""
+        return reply
+
+    def endRun(self, now):
+        if self.timer.phase != "NotRunning":
+            self.runs.append((self._started, list(self.timer.splits), self.timer.realTime(now),
+                              self.timer.gameTime(now)))
+            self.timer.reset()
+
+
+class RetimeSplitter(autoSplitter):
+    def __init__(self, livesplit, source, detections):
+        self.detections = detections
+        super().__init__(livesplit, source)
+
+    def loadFile(self):
+        tests = {"standby": self.file.standby_patterns, "prerun": self.file.prerun_patterns,
+                 "runtime": self.file.run_patterns}
+        self.standby_monitor = ReplayedTest(tests["standby"], self.detections[:, 0], self.source)
+        self.prerun_monitor = ReplayedTest(tests["prerun"], self.detections[:, 1], self.source)
+        self.run_monitor = ReplayedTest(tests["runtime"], self.detections[:, 2], self.source)
+        self.prerun_monitor.last_test["name"] = None
+        self.view.highlight_pattern()
+
+
+# ---Functions---
+
+def _initWorker(path, screens, groups):
+    _worker["path"], _worker["screens"], _worker["groups"] = path, screens, groups
+
+
+def _scanChunk(chunk):     # (first frame, frames or None for the rest) -> (first frame, detections, seconds)
+    start, count = chunk
+    began = time.perf_counter()
+    try:
+        source = VideoSource(_worker["path"], start_frame=start)
+    except ValueError:
+        return start, numpy.empty((0, len(GROUPS)), numpy.int16), 0.0
+    monitors = []
+    for group in GROUPS:
+        tests = _worker["groups"][group]
+        monitors.append((screenTest(_worker["screens"][group], tests, source), {id(t): n for n, t in enumerate(tests)}))
+
+    out = []
+    while True:
+        out.append(tuple(index[id(monitor.last_test)] if monitor.test() else -1 for monitor, index in monitors))
+        if len(out) == count or not source.advance():
+            break
+    return start, numpy.array(out, numpy.int16).reshape(-1, len(GROUPS)), time.perf_counter() - began
+
+
+def scanVideo(path, screens, groups, processes=None, chunk_seconds=30.0):
+    video = cv2.VideoCapture(path)
+    if not video.isOpened():
+        raise ValueError(f"Unable to open video: {path}")
+    rate = video.get(cv2.CAP_PROP_FPS) or 60.0
+    frames = int(video.get(cv2.CAP_PROP_FRAME_COUNT))
+    video.release()
+
+    processes = processes or os.cpu_count() or 1
+    size = max(1, int(chunk_seconds * rate))
+    chunks = [(start, size) for start in range(0, max(frames - size, 0), size)]
+    chunks.append((chunks[-1][0] + size if chunks else 0, None))    # The frame count is a hint; read to the end.
+
+    detections = numpy.full((max(frames, 1), len(GROUPS)), -1, numpy.int16)
+    scanned, worked = 0, 0.0
+    initargs = (path, screens, groups)
+    if processes == 1:
+        _initWorker(*initargs)
+        results = list(map(_scanChunk, chunks))
+    else:
+        with multiprocessing.Pool(processes, _initWorker, initargs) as pool:    # Terminated on errors and Ctrl-C.
+            results = list(pool.imap_unordered(_scanChunk, chunks))
+    for start, found, seconds in results:
+        if start + len(found) > len(detections):
+            grown = numpy.full((start + len(found), len(GROUPS)), -1, numpy.int16)
+            grown[:len(detections)] = detections
+            detections = grown
+        detections[start:start + len(found)] = found
+        scanned += len(found)
+        worked += seconds
+    return detections, rate, scanned, worked
+
+
+def retime(file, detections, rate, segments=0):
+    source = DetectionSource(len(detections), rate)
+    timer = SplitTimer(segments)
+    livesplit = TimerClient(timer, source)
+    speedrun = RetimeSplitter(livesplit, source, detections)
+    speedrun.save_on_exit = False
+    speedrun.mainloop(file, HeadlessView(quiet=True, fps_interval=0))
+    livesplit.endRun(source.time())
+    return livesplit.runs
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Retime a recorded run from a video file.")
+    parser.add_argument("pattern_file", help="Pattern .cfg file to load.")
+    parser.add_argument("video", help="Local video file of the run.")
+    parser.add_argument("--processes", type=int, help="Worker processes. (default: one per CPU)")
+    parser.add_argument("--chunk", type=float, default=30.0, help="Seconds of video per work unit. (default: 30)")
+    parser.add_argument("--segments", type=int, default=0, help="Splits in a full run; 0 = runs never end.")
+    parser.add_argument("--resolution", help="Screen size the video shows, e.g. 2560,1440. (default: the video's)")
+    parser.add_argument("--origin", default="0,0", help="Position of the game screen in the video. (default: 0,0)")
+    parser.add_argument("--csv", help="Write the split times to this CSV file.")
+    args = parser.parse_args(argv)
+    args.pattern_file, args.video = os.path.abspath(args.pattern_file), os.path.abspath(args.video)
+    if args.csv: args.csv = os.path.abspath(args.csv)
+
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory(prefix="splitrp_retime_") as work:
+        os.chdir(work)      # fileAccess keeps settings.cfg and falsies/ in the working directory; leave the user's alone.
+        try:
+            return retimeVideo(args)
+        finally:
+            os.chdir(cwd)
+
+
+def retimeVideo(args):
+    video = cv2.VideoCapture(args.video)
+    if not video.isOpened():
+        print(f"Unable to open video: {args.video}")
+        return 1
+    width, height = int(video.get(cv2.CAP_PROP_FRAME_WIDTH)), int(video.get(cv2.CAP_PROP_FRAME_HEIGHT))
+    video.release()
+    resolution = [int(n) for n in args.resolution.split(",")] if args.resolution else [width, height]
+
+    speedrun = autoSplitter(None)
+    file = fileAccess(speedrun, args.pattern_file)
+    file.pattern_scale = resolution
+    file.pattern_translation = [int(n) for n in args.origin.split(",")]
+    if not file.loadPattern():
+        print(f"Unable to load pattern file: {args.pattern_file}")
+        return 1
+    for screen in file.all_screens:
+        if screen["left"] + screen["width"] > width or screen["top"] + screen["height"] > height:
+            print(f"The video is {width}x{height}, the screenshot areas reach "
+                  f"{screen['left'] + screen['width']}x{screen['top'] + screen['height']}. "
+                  f"Use --resolution and --origin to match the game's place in the video.")
+            return 1
+    file.lock_to_window = False
+    file.autoclicker_active = False
+    file.false_split_period = 0.0      # Judged on the wall clock, which means nothing offline.
+    file.roulette = False               # Roulette level selection clicks the mouse.
+    file.watch_patterns = False
+    file.livesplit_host = "localhost"
+
+    screens = {"standby": file.start_screen, "prerun": file.start_screen, "runtime": file.run_screen}
+    groups = {"standby": file.standby_patterns, "prerun": file.prerun_patterns, "runtime": file.run_patterns}
+    began = time.perf_counter()
+    detections, rate, scanned, worked = scanVideo(args.video, screens, groups, args.processes, args.chunk)
+    scan_time = time.perf_counter() - began
+    runs = retime(file, detections, rate, args.segments)
+    elapsed = time.perf_counter() - began
+
+    length = len(detections) / rate
+    print(f"Scanned {scanned} frames ({secsToHMS(length)} of video) in {elapsed:.1f} s, "
+          f"{length / elapsed:.0f}x realtime ({scanned / worked if worked else 0:.0f} frames/s per process, "
+          f"state machine {elapsed - scan_time:.2f} s)")
+    if scanned < len(detections):
+        print(f"Warning: {len(detections) - scanned} frames could not be read")
+    if not runs:
+        print("No run was started.")
+
+    rows = []
+    for number, (started, splits, real, game) in enumerate(runs, 1):
+        print(f"\n--- Run {number}, starting at {secsToHMS(started)} in the video ---")
+        print(f"{'split':>5s} {'real':>12s} {'load removed':>13s} {'segment':>10s}")
+        last = 0.0
+        for n, (split_real, split_game) in enumerate(splits, 1):
+            if split_real is None:
+                print(f"{n:5d} {'skipped':>12s}")
+                continue
+            print(f"{n:5d} {secsToHMS(split_real):>12s} {secsToHMS(split_game):>13s} {secsToHMS(split_game - last):>10s}")
+            rows.append([number, n, f"{split_real:.3f}", f"{split_game:.3f}"])
+            last = split_game
+        print(f"{'final':>5s} {secsToHMS(real):>12s} {secsToHMS(game):>13s}")
+        rows.append([number, "final", f"{real:.3f}", f"{game:.3f}"])
+
+    if args.csv:
+        with open(args.csv, "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["run", "split", "real_seconds", "load_removed_seconds"])
+            writer.writerows(rows)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())